@@ -0,0 +1,86 @@
+"""
+Benchmark writing sales to a local SQLite database
+
+Compares one store_sale commit per sale with bulk_store_sales, then runs
+the bulk path again over the same sales (all skipped) and over re-priced
+sales (all updated). Every path also maintains the daily rollup, which is
+checked against the raw sales at the end.
+
+    python benchmarks/bench_db.py --sales 100000 --per-row-sales 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from fixture_site import generate_cards
+from database.models import Base, AudiR8Sale
+from database.operations import store_sale, bulk_store_sales, DEFAULT_BATCH_SIZE
+from database.rollup import check_rollup
+from listing_parser import parse_listing
+
+
+def make_sales(count):
+    sales = {}
+    for card in generate_cards(count * 2, years=(2008, 2015)):
+        sale = parse_listing(card['name'], card['details'])
+        if sale and "bid to" not in card['details'].lower():
+            sales.setdefault((sale['name'], sale['date']), sale)
+            if len(sales) == count:
+                break
+    return list(sales.values())
+
+
+def new_session(path):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>22}: {elapsed:8.3f}s  {count / elapsed:10,.0f} sales/s  {result or ''}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sales", type=int, default=100_000)
+    parser.add_argument("--per-row-sales", type=int, default=5_000,
+                        help="sales for the one-commit-per-sale path, which is much slower")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    sales = make_sales(args.sales)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sales.db")
+
+        session = new_session(path)
+        per_row = sales[:args.per_row_sales]
+        timed("store_sale per row", len(per_row), lambda: [store_sale(session, sale) for sale in per_row] and None)
+        session.close()
+
+        session = new_session(path)
+        timed("bulk insert", len(sales), lambda: bulk_store_sales(session, sales, args.batch_size))
+        timed("bulk re-run (skip)", len(sales), lambda: bulk_store_sales(session, sales, args.batch_size))
+        repriced = [dict(sale, price=sale['price'] + 1) for sale in sales]
+        timed("bulk re-priced (update)", len(sales), lambda: bulk_store_sales(session, repriced, args.batch_size))
+        rows = session.query(func.count(AudiR8Sale.id)).scalar()
+        assert rows == len(sales), f"expected {len(sales)} rows, found {rows}"
+        mismatches = check_rollup(session)
+        assert not mismatches, f"{len(mismatches)} rollup buckets disagree with r8_sales"
+        print(f"Table holds {rows:,} unique sales and the daily rollup matches them")
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
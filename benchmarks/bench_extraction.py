@@ -0,0 +1,174 @@
+"""
+Benchmark per-element listing extraction against the bulk modes
+
+Runs web_scraper.extract_listing_texts against a fake driver that serves the
+saved Bring a Trailer fixture and charges a fixed latency per WebDriver
+command, which is what dominates against a real chromedriver. The fake
+driver cannot run JavaScript, so its script mode only counts round trips
+and its rows are not checked. --browser loads the same page in headless
+Chrome instead and checks that all modes, including the extraction script,
+give identical rows from every starting card.
+
+    python benchmarks/bench_extraction.py --cards 3000 --latency-ms 2
+    python benchmarks/bench_extraction.py --cards 3000 --browser
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from saveCSV import parse_listing_data
+from web_scraper import (
+    extract_listing_texts, LISTING_NAME_SELECTOR, LISTING_DETAILS_SELECTOR
+)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FakeElement:
+    def __init__(self, driver, texts):
+        self.driver = driver
+        self.texts = texts
+
+    def find_element(self, by, selector):
+        self.driver.round_trip()
+        if selector not in self.texts:
+            raise Exception(f"no such element: {selector}")
+        return FakeText(self.texts[selector])
+
+
+class FakeText:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeDriver:
+    """Serves a fixture page and counts simulated WebDriver round trips."""
+
+    def __init__(self, html, rows, latency):
+        self.html = html
+        self.rows = rows
+        self.latency = latency
+        self.round_trips = 0
+
+    def round_trip(self):
+        self.round_trips += 1
+        time.sleep(self.latency)
+
+    @property
+    def page_source(self):
+        self.round_trip()
+        return self.html
+
+    def execute_script(self, script, *args):
+        # Stands in for EXTRACT_LISTINGS_SCRIPT without evaluating it
+        self.round_trip()
+        start = args[3] if len(args) > 3 else 0
+        return json.dumps([list(row) if row else None for row in self.rows[start:]])
+
+    def find_elements(self, by, selector):
+        self.round_trip()
+        elements = []
+        for row in self.rows:
+            texts = {}
+            if row:
+                texts = {LISTING_NAME_SELECTOR: row[0], LISTING_DETAILS_SELECTOR: row[1]}
+            elements.append(FakeElement(self, texts))
+        return elements
+
+
+def load_fixture(cards):
+    with open(os.path.join(FIXTURES, "bat_listings.html"), encoding="utf-8") as f:
+        html = f.read()
+    with open(os.path.join(FIXTURES, "bat_listings.expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+
+    # Repeat the fixture's cards until the page holds the requested number
+    card_html = re.findall(r"( *<a class=\"listing-card.*?</a>\n)", html, re.S)
+    expected_rows = iter(expected)
+    card_rows = [
+        tuple(next(expected_rows)) if "item-results" in block else None
+        for block in card_html
+    ]
+    repeats = -(-cards // len(card_html))
+    start = html.index(card_html[0])
+    end = html.index(card_html[-1]) + len(card_html[-1])
+    page = html[:start] + "".join(card_html) * repeats + html[end:]
+    return page, (card_rows * repeats)
+
+
+def build_rows(pairs):
+    rows = []
+    for name, details in pairs:
+        if "bid to" not in details.lower():
+            row = parse_listing_data(name, details)
+            if row:
+                rows.append(row)
+    return rows
+
+
+def run_fake(html, card_rows, latency):
+    results = {}
+    for mode in ("elements", "snapshot", "script"):
+        driver = FakeDriver(html, card_rows, latency)
+        start = time.perf_counter()
+        rows = build_rows(extract_listing_texts(driver, mode))
+        elapsed = time.perf_counter() - start
+        results[mode] = rows
+        print(f"{mode:>9}: {len(rows):>6} rows  {driver.round_trips:>6} round trips  {elapsed:8.3f}s")
+
+    assert results["snapshot"] == results["elements"], "snapshot rows differ from per-element rows"
+    print("Snapshot and per-element modes produced identical rows")
+
+
+def run_browser(html, card_count):
+    from config import get_headless_chrome_options
+    from driver_setup import initialize_driver
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", encoding="utf-8", delete=False) as f:
+        f.write(html)
+    driver = initialize_driver(get_headless_chrome_options())
+    try:
+        driver.get("file://" + f.name)
+        results = {}
+        for mode in ("elements", "snapshot", "script"):
+            start = time.perf_counter()
+            rows = extract_listing_texts(driver, mode)
+            elapsed = time.perf_counter() - start
+            results[mode] = rows
+            print(f"{mode:>9}: {len(build_rows(rows)):>6} rows  {elapsed:8.3f}s  (headless Chrome)")
+
+        assert results["snapshot"] == results["elements"], "snapshot rows differ from per-element rows"
+        assert results["script"] == results["elements"], "script rows differ from per-element rows"
+        # Later pages read from the first new card; cover starts on and around skipped cards
+        for start in sorted({1, 2, 3, card_count // 2, card_count - 1, card_count}):
+            expected = extract_listing_texts(driver, "snapshot", start)
+            assert extract_listing_texts(driver, "script", start) == expected, f"script rows differ from card {start}"
+        print("All extraction modes produced identical rows")
+    finally:
+        driver.quit()
+        os.remove(f.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cards", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--browser", action="store_true",
+                        help="run the modes in headless Chrome and compare their rows")
+    args = parser.parse_args()
+
+    html, card_rows = load_fixture(args.cards)
+    if args.browser:
+        run_browser(html, len(card_rows))
+    else:
+        run_fake(html, card_rows, args.latency_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark live graph frames during a simulated crawl
+
+Feeds synthetic sales to LiveCharts one page at a time on an off-screen
+Agg canvas, rendering a frame per page, and reports the mean cost of a
+frame, how many frames had to redraw the background, and the final frame
+drawn when the crawl ends. --full-redraw draws the whole figure on every
+frame instead of blitting, for comparison.
+
+    python benchmarks/bench_live_charts.py --listings 20000 --page-size 36
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from generate_fixtures import generate_listings
+from listing_parser import parse_listing
+from live_charts import LiveChartData, LiveCharts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--listings", type=int, default=20_000, help="generated listing cards")
+    parser.add_argument("--page-size", type=int, default=36, help="cards per crawled page")
+    parser.add_argument("--full-redraw", action="store_true", help="redraw the whole figure every frame")
+    args = parser.parse_args()
+
+    rows = [row for card in generate_listings(args.listings, years=(2008, 2015))
+            if "bid to" not in card["details"].lower()
+            for row in [parse_listing(card["name"], card["details"])] if row]
+    figure = Figure(figsize=(12, 8), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    data = LiveChartData()
+    charts = LiveCharts(figure, canvas, data, fps=1_000_000, blit=not args.full_redraw)
+
+    frames = 0
+    start = time.perf_counter()
+    for first in range(0, len(rows), args.page_size):
+        data.add(rows[first:first + args.page_size])
+        charts.render()
+        frames += 1
+    crawl = time.perf_counter() - start
+    start = time.perf_counter()
+    charts.finish()
+    final = time.perf_counter() - start
+
+    print(f"{len(rows):,} sales in {frames} pages ({'full redraw' if args.full_redraw else 'blit'})")
+    print(f"  frame: {crawl / frames * 1000:7.1f} ms mean, {charts.redraws} background redraws")
+    print(f"  final: {final * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
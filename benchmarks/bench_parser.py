@@ -0,0 +1,89 @@
+"""
+Benchmark listing parsing on synthetic listings
+
+Compares the old per-listing regex parsing with listing_parser.parse_listing
+and the pandas batch path, and checks all three produce the same rows.
+
+    python benchmarks/bench_parser.py --listings 1000000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_site import generate_cards
+from listing_parser import parse_listing, parse_listing_batch
+
+
+def legacy_parse_listing_data(name, details):
+    """The parser previously copied into saveCSV.py and main.py."""
+    year_match = re.search(r'\b(20\d{2})\b', name)
+    year = int(year_match.group(1)) if year_match else None
+    if not year or year < 2008 or year > 2015:
+        return None
+    price_match = re.search(r"\$([0-9,]+)", details)
+    if not price_match:
+        return None
+    price = float(price_match.group(1).replace(',', ''))
+    date_match = re.search(r"on (\d{1,2}/\d{1,2}/\d{2})", details)
+    if not date_match:
+        return None
+    try:
+        date = datetime.strptime(date_match.group(1), "%m/%d/%y")
+    except ValueError:
+        return None
+    return {
+        'name': name,
+        'year': year,
+        'price': price,
+        'date': date,
+        'is_manual': '6-Speed' in name,
+        'is_v10': 'V10' in name
+    }
+
+
+def run_per_listing(parse, names, details):
+    rows = []
+    for name, detail in zip(names, details):
+        if "bid to" not in detail.lower():
+            row = parse(name, detail)
+            if row:
+                rows.append(row)
+    return rows
+
+
+def timed(label, count, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>12}: {elapsed:8.3f}s  {count / elapsed:12,.0f} listings/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cards = generate_cards(args.listings)
+    names = [card['name'] for card in cards]
+    details = [card['details'] for card in cards]
+
+    legacy = timed("legacy", args.listings, run_per_listing, legacy_parse_listing_data, names, details)
+    single = timed("single-pass", args.listings, run_per_listing, parse_listing, names, details)
+    batch = timed("batch", args.listings, parse_listing_batch, names, details)
+
+    assert single == legacy, "parse_listing rows differ from the legacy parser"
+    batch_rows = batch.to_dict('records')
+    for row in batch_rows:
+        row['date'] = row['date'].to_pydatetime()
+    assert batch_rows == legacy, "batch rows differ from the legacy parser"
+    print(f"All parsers produced the same {len(legacy):,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark GUI time-to-first-paint
+
+Starts main.py's window in a fresh interpreter, in a working directory
+holding a saved sales dataset, and records seconds from process launch to:
+importing main, the window's first paint, the saved sales appearing in the
+summary, and the charts being drawn once the Graphs tab is selected.
+Without a display only the import and the saved-sales load are timed.
+Pass --repo to time another checkout, e.g. a worktree of an older commit.
+
+    python benchmarks/bench_startup.py --sales 20000 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generate_fixtures import generate_listings
+from listing_parser import parse_listing
+from sales_dataset import append_sales, get_dataset_path
+
+CHILD = r"""
+import json, os, sys, time
+start = float(sys.argv[1])
+sys.path.insert(0, sys.argv[2])
+marks = {}
+def mark(name):
+    marks.setdefault(name, time.time() - start)
+
+import main
+mark("import")
+if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+    import tkinter as tk
+    root = tk.Tk()
+    app = main.AudiAnalysisGUI(root)
+    root.bind("<Map>", lambda event: mark("first_paint"))
+    deadline = time.time() + 60
+    while time.time() < deadline and "charts" not in marks:
+        root.update()
+        if "first_paint" in marks and len(getattr(app, "listings_data", ())):
+            mark("saved_sales")
+            if "charts_requested" not in marks:
+                marks["charts_requested"] = 0
+                app.notebook.select(app.graphs_tab)
+                root.update()
+                if getattr(app, "canvas", None) is None:
+                    app.update_graphs()
+                root.update()
+                mark("charts")
+        elif "first_paint" in marks and not hasattr(main.AudiAnalysisGUI, "load_saved_listings"):
+            break
+    marks.pop("charts_requested", None)
+    root.destroy()
+elif hasattr(main, "AudiAnalysisGUI") and hasattr(main.AudiAnalysisGUI, "load_saved_listings"):
+    from sales_dataset import load_last_sales
+    store, _ = load_last_sales()
+    mark("saved_sales")
+print(json.dumps(marks))
+"""
+
+
+def write_dataset(workdir, sales):
+    rows = []
+    for card in generate_listings(sales * 2, years=(2008, 2015)):
+        if "bid to" in card["details"].lower():
+            continue
+        row = parse_listing(card["name"], card["details"])
+        if row:
+            rows.append(row)
+            if len(rows) == sales:
+                break
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        append_sales(get_dataset_path(), rows)
+    finally:
+        os.chdir(cwd)
+    return len(rows)
+
+
+def run_once(repo, workdir):
+    start = time.time()
+    out = subprocess.run([sys.executable, "-c", CHILD, str(start), repo], cwd=workdir,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sales", type=int, default=20_000, help="sales in the saved dataset")
+    parser.add_argument("--runs", type=int, default=5, help="report the median of this many launches")
+    parser.add_argument("--repo", default=ROOT, help="checkout whose main.py is launched")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        saved = write_dataset(workdir, args.sales)
+        runs = [run_once(os.path.abspath(args.repo), workdir) for _ in range(args.runs)]
+
+    print(f"{args.repo}: {saved:,} saved sales, median of {args.runs} launches"
+          + ("" if os.environ.get("DISPLAY") else " (no display: window not opened)"))
+    for mark in ("import", "first_paint", "saved_sales", "charts"):
+        values = [run[mark] for run in runs if mark in run]
+        if values:
+            print(f"{mark:>12}: {statistics.median(values):7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
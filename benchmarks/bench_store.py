@@ -0,0 +1,126 @@
+"""
+Benchmark the columnar listing store against the old tuple lists
+
+Measures retained memory and throughput of loading listings into
+PriceAnalyzer and of the per-category queries the reports and GUIs run.
+
+    python benchmarks/bench_store.py --listings 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_site import generate_cards
+from data_processor import ListingData, PriceAnalyzer
+from listing_parser import parse_listing_batch, parse_price
+from listing_store import ListingStore
+
+
+class LegacyPriceAnalyzer:
+    """PriceAnalyzer as it was: six lists of (ListingData, price) tuples."""
+
+    def __init__(self):
+        self.with_manual = []
+        self.without_manual = []
+        self.v8_with_manual = []
+        self.v8_without_manual = []
+        self.v10_with_manual = []
+        self.v10_without_manual = []
+
+    def process_listing(self, listing):
+        if "bid to" not in listing.details.lower():
+            price = parse_price(listing.details)
+            v10_present = 'V10' in listing.name
+            if price is not None:
+                if '6-Speed' in listing.name:
+                    self.with_manual.append((listing, price))
+                    (self.v10_with_manual if v10_present else self.v8_with_manual).append((listing, price))
+                else:
+                    self.without_manual.append((listing, price))
+                    (self.v10_without_manual if v10_present else self.v8_without_manual).append((listing, price))
+
+
+CATEGORIES = ['with_manual', 'without_manual', 'v8_with_manual',
+              'v8_without_manual', 'v10_with_manual', 'v10_without_manual']
+
+
+def legacy_queries(analyzer):
+    results = []
+    for category in CATEGORIES:
+        listings = getattr(analyzer, category)
+        prices = [price for _, price in listings]
+        results.append((len(prices), sum(prices) / len(prices) if prices else 0,
+                        min(prices, default=0), max(prices, default=0)))
+    return results
+
+
+def store_queries(analyzer):
+    results = []
+    for category in CATEGORIES:
+        view = getattr(analyzer, category)
+        count = len(view)
+        results.append((count, view.mean(), view.min() if count else 0, view.max() if count else 0))
+    return results
+
+
+def load(analyzer, names, details):
+    for name, detail in zip(names, details):
+        analyzer.process_listing(ListingData(name, detail, 0.0))
+    if hasattr(analyzer, 'store'):
+        analyzer.store.prices  # copy buffered rows into the columns
+    return analyzer
+
+
+def measure(label, rows, func, make_args):
+    # Time and memory come from separate runs since tracemalloc slows allocation
+    start = time.perf_counter()
+    result = func(*make_args())
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = func(*make_args())
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>22}: {elapsed:8.3f}s  {rows / elapsed:12,.0f} rows/s  {retained / 2**20:8.1f} MiB retained")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--query-repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    cards = generate_cards(args.listings, years=(2008, 2015))
+    names = [card['name'] for card in cards]
+    details = [card['details'] for card in cards]
+    count = len(names)
+
+    legacy = measure("legacy process_listing", count, load, lambda: (LegacyPriceAnalyzer(), names, details))
+    current = measure("store process_listing", count, load, lambda: (PriceAnalyzer(), names, details))
+
+    frame = parse_listing_batch(names, details)
+    measure("store bulk from_frame", len(frame), ListingStore.from_frame, lambda: (frame,))
+
+    rows = len(current.store)
+    for label, queries, analyzer in (("legacy queries", legacy_queries, legacy),
+                                     ("store queries", store_queries, current)):
+        queries(analyzer)
+        start = time.perf_counter()
+        for _ in range(args.query_repeats):
+            result = queries(analyzer)
+        elapsed = (time.perf_counter() - start) / args.query_repeats
+        print(f"{label:>22}: {elapsed * 1000:8.1f}ms per pass over 6 categories ({rows / elapsed:12,.0f} rows/s)")
+        if label == "legacy queries":
+            expected = result
+    assert [(n, round(a, 6), lo, hi) for n, a, lo, hi in result] == \
+           [(n, round(a, 6), lo, hi) for n, a, lo, hi in expected], "category stats differ"
+    print("Legacy lists and columnar store agree on every category")
+
+
+if __name__ == "__main__":
+    main()
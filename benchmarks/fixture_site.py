@@ -0,0 +1,349 @@
+"""
+Local stand-in for the Bring a Trailer Audi R8 page
+
+Serves a page with the same DOM paths the scraper relies on: the "Year Range"
+filter, the min/max year inputs, the listings grid and the "Show More"
+button, which reveals cards a page at a time with a short simulated delay.
+The page also embeds the site's initial listings data and the JSON listings
+endpoint answers paged, year-filtered requests, for the HTTP backend. Every
+card links to a detail page with a "Listing Details" spec list, served with
+an ETag so conditional requests get 304 Not Modified.
+
+    python benchmarks/fixture_site.py --port 8000 --listings 2000
+    python parallel_crawl.py --base-url http://localhost:8000/audi/r8/
+"""
+import argparse
+import hashlib
+import html
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+LISTINGS_API_PATH = "/wp-json/bringatrailer/1.0/data/listings-filter"
+API_BASE_FILTER = {"items_type": "model", "items_id": 1000}
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+MODELS = [
+    "{year} Audi R8 4.2 6-Speed",
+    "{year} Audi R8 4.2",
+    "{year} Audi R8 4.2 R tronic",
+    "{year} Audi R8 5.2 V10 6-Speed",
+    "{year} Audi R8 V10",
+    "{year} Audi R8 Spyder 5.2 V10 6-Speed",
+    "{year} Audi R8 4.2 Spyder",
+    "{mileage}k-Mile {year} Audi R8 V10 Spyder 6-Speed",
+]
+
+
+def generate_cards(count, seed=0, years=(2006, 2020)):
+    """Return fixture listing cards as dicts with name, details, year and url."""
+    rng = random.Random(seed)
+    cards = []
+    for i in range(count):
+        year = rng.randint(*years)
+        name = rng.choice(MODELS).format(year=year, mileage=rng.randint(3, 90))
+        price = rng.randrange(40, 200) * 1000 + rng.choice([0, 250, 500])
+        sale = f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/{rng.randint(15, 24)}"
+        outcome = rng.random()
+        if outcome < 0.15:
+            details = f"Bid to USD ${price:,} on {sale}"
+        elif outcome < 0.18:
+            details = "Withdrawn"
+        else:
+            details = f"Sold for USD ${price:,} on {sale}"
+        slug = name.lower().replace(" ", "-").replace(".", "")
+        cards.append({
+            "name": name,
+            "details": details,
+            "year": year,
+            "url": f"/listing/{slug}-{i}/",
+        })
+    return cards
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>Audi R8 for Sale - Fixture</title></head>
+<body>
+<main>
+  <div class="header">Audi R8</div>
+  <div>
+    <div>
+      <div class="intro">Fixture auction results</div>
+      <div>
+        <div>
+          <div>
+            <div class="filters">
+              <div>
+                <div>Filter</div>
+                <div>
+                  <div></div>
+                  <div></div>
+                  <div>
+                    <div></div>
+                    <div></div>
+                    <div></div>
+                    <div>
+                      <div><button type="button" id="year-range">Year Range</button></div>
+                      <div style="display: none" id="year-inputs">
+                        <div>
+                          <input type="text" id="min-year">
+                          <input type="text" id="max-year">
+                        </div>
+                      </div>
+                    </div>
+                  </div>
+                </div>
+              </div>
+            </div>
+            <div>
+              <div class="listings-container auctions-grid" id="grid"></div>
+              <div><button type="button" id="show-more">Show More</button></div>
+            </div>
+          </div>
+        </div>
+      </div>
+    </div>
+  </div>
+</main>
+<script>
+var auctionsCompletedInitialData = __INITIAL_DATA__;
+</script>
+<script>
+const CARDS = __CARDS__;
+const PAGE_SIZE = __PAGE_SIZE__;
+const DELAY_MS = __DELAY_MS__;
+let filtered = CARDS;
+let shown = 0;
+
+function cardHtml(card) {
+  const a = document.createElement('a');
+  a.className = 'listing-card bg-white-transparent';
+  a.href = card.url;
+  const content = document.createElement('div');
+  content.className = 'content-main';
+  const h3 = document.createElement('h3');
+  h3.textContent = card.name;
+  const results = document.createElement('div');
+  results.className = 'item-results';
+  results.textContent = card.details;
+  content.append(h3, results);
+  a.append(content);
+  return a;
+}
+
+function showNext() {
+  const grid = document.getElementById('grid');
+  for (const card of filtered.slice(shown, shown + PAGE_SIZE)) grid.append(cardHtml(card));
+  shown = Math.min(shown + PAGE_SIZE, filtered.length);
+  document.getElementById('show-more').style.display = shown < filtered.length ? '' : 'none';
+}
+
+function applyFilter() {
+  const min = parseInt(document.getElementById('min-year').value) || 0;
+  const max = parseInt(document.getElementById('max-year').value) || 9999;
+  if (min && min < 1000 || max < 1000) return;
+  filtered = CARDS.filter(card => card.year >= min && card.year <= max);
+  document.getElementById('grid').innerHTML = '';
+  shown = 0;
+  showNext();
+}
+
+document.getElementById('year-range').addEventListener('click', () => {
+  document.getElementById('year-inputs').style.display = '';
+});
+document.getElementById('min-year').addEventListener('input', applyFilter);
+document.getElementById('max-year').addEventListener('input', applyFilter);
+document.getElementById('show-more').addEventListener('click', event => {
+  const button = event.target;
+  button.disabled = true;
+  setTimeout(() => { showNext(); button.disabled = false; }, DELAY_MS);
+});
+showNext();
+</script>
+</body>
+</html>
+"""
+
+
+def api_item(card):
+    """A card as the listings endpoint returns it; the result text carries inline markup."""
+    sold_text = card["details"].replace(" on ", " <span> on ", 1)
+    if sold_text != card["details"]:
+        sold_text += "</span>"
+    return {"title": card["name"], "url": card["url"], "year": card["year"], "sold_text": sold_text}
+
+
+def api_page(cards, page, per_page, min_year=None, max_year=None):
+    """One page of the listings endpoint's response."""
+    if min_year or max_year:
+        cards = [card for card in cards
+                 if (min_year or 0) <= card["year"] <= (max_year or 9999)]
+    start = (page - 1) * per_page
+    return {
+        "items": [api_item(card) for card in cards[start:start + per_page]],
+        "items_total": len(cards),
+        "page_current": page,
+        "pages_total": max(1, math.ceil(len(cards) / per_page)),
+    }
+
+
+DETAIL_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>{title} for sale on BaT Auctions</title></head>
+<body>
+<main>
+  <h1 class="post-title listing-post-title">{title}</h1>
+  <div class="listing-available-info">{details}</div>
+  <div class="essentials">
+    <div class="item"><strong>Location</strong>: <a href="#">Fixture, California 90000</a></div>
+    <div class="item">
+      <strong>Listing Details</strong>
+      <ul>
+        <li>Chassis: <a href="#">{chassis}</a></li>
+        <li>{mileage_text}</li>
+        <li>{engine}</li>
+        <li>{transmission}</li>
+        <li>{color} Paint</li>
+        <li>Black Leather Upholstery</li>
+      </ul>
+    </div>
+  </div>
+</main>
+</body>
+</html>
+"""
+# Mileage as it appears on detail pages; the last also lists kilometres
+MILEAGE_FORMATS = ["{k}k Miles", "{miles:,} Miles", "~{k}k Miles Shown, TMU", "{km}k Kilometers (~{k}k Miles)"]
+COLORS = ["Ibis White", "Phantom Black Pearl", "Daytona Gray Pearl", "Suzuka Gray Metallic", "Brilliant Red"]
+
+
+def card_specs(card):
+    """Detail-page specs for a card, derived from its URL so they never change between runs."""
+    rng = random.Random(card["url"])
+    fmt = rng.choice(MILEAGE_FORMATS)
+    title_mileage = re.match(r"(\d+)k-Mile", card["name"])
+    if title_mileage:
+        miles = int(title_mileage.group(1)) * 1000
+    elif "{miles" in fmt:
+        miles = rng.randint(2000, 90000)
+    else:
+        miles = rng.randint(2, 90) * 1000
+    mileage_text = fmt.format(k=miles // 1000, miles=miles, km=round(miles / 621.371))
+    v10 = "V10" in card["name"]
+    return {
+        "mileage": miles,
+        "mileage_text": mileage_text,
+        "chassis": f"WUA{'ANAFG' if v10 else 'ENAFG'}{rng.randint(0, 9)}{rng.choice('89ABCDEF')}N{rng.randint(0, 999999):06d}",
+        "engine": "5.2-Liter V10" if v10 else "4.2-Liter V8",
+        "transmission": "Six-Speed Manual Transaxle" if "6-Speed" in card["name"] else "R tronic Automated Manual Transaxle",
+        "color": rng.choice(COLORS),
+    }
+
+
+def render_detail(card):
+    specs = card_specs(card)
+    return DETAIL_TEMPLATE.format(title=html.escape(card["name"]), details=html.escape(card["details"]),
+                                  **{key: html.escape(str(value)) for key, value in specs.items()})
+
+
+def render_page(cards, page_size=24, delay_ms=50):
+    initial = dict(api_page(cards, 1, page_size), base_filter=API_BASE_FILTER)
+    return (PAGE_TEMPLATE
+            .replace("__INITIAL_DATA__", json.dumps(initial).replace("</", "<\\/"))
+            .replace("__CARDS__", json.dumps(cards))
+            .replace("__PAGE_SIZE__", str(page_size))
+            .replace("__DELAY_MS__", str(delay_ms)))
+
+
+def make_handler(page, cards=(), page_size=24, delay_ms=0):
+    body = page.encode("utf-8")
+    by_path = {card["url"]: card for card in cards}
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        # Detail page responses by status code, to check that caching clients revalidate
+        detail_responses = Counter()
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == LISTINGS_API_PATH:
+                self.send_listings(parse_qs(url.query))
+                return
+            if url.path in by_path:
+                self.send_detail(by_path[url.path])
+                return
+            if url.path.rstrip("/") != "/audi/r8":
+                self.send_error(404)
+                return
+            self.send_body(body, "text/html; charset=utf-8")
+
+        def send_listings(self, query):
+            def number(key, default=None):
+                value = query.get(key, [""])[0]
+                return int(value) if value.isdigit() else default
+            time.sleep(delay_ms / 1000)
+            page = api_page(list(cards), number("page", 1), number("per_page", page_size),
+                            number("minimum_year"), number("maximum_year"))
+            self.send_body(json.dumps(page).encode("utf-8"), "application/json")
+
+        def send_detail(self, card):
+            data = render_detail(card).encode("utf-8")
+            etag = f'"{hashlib.sha1(data).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.detail_responses[304] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.detail_responses[200] += 1
+            self.send_body(data, "text/html; charset=utf-8", {"ETag": etag, "Last-Modified": LAST_MODIFIED})
+
+        def send_body(self, data, content_type, headers=None):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def start_fixture_site(listings=2000, seed=0, port=0, page_size=24, delay_ms=50):
+    """Serve the fixture site from a background thread; return (server, base_url)."""
+    cards = generate_cards(listings, seed)
+    page = render_page(cards, page_size, delay_ms)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(page, cards, page_size, delay_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/audi/r8/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--listings", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--page-size", type=int, default=24)
+    parser.add_argument("--delay-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    server, url = start_fixture_site(args.listings, args.seed, args.port, args.page_size, args.delay_ms)
+    print(f"Serving fixture site at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Generate synthetic Bring a Trailer listing fixtures
+
+Builds on fixture_site.generate_cards (sold, "bid to" and withdrawn results)
+and mixes in malformed cards the parsers must reject or survive: missing
+prices, impossible dates, missing dates, non-first-gen or yearless names,
+empty details and results split over several lines. Writes the cards as
+JSON lines (name, details, year, url) and as a static results page with the
+same DOM paths as the saved Bring a Trailer fixture.
+
+    python benchmarks/generate_fixtures.py --count 1000 --count 1000000
+"""
+import argparse
+import html
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_site import generate_cards
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _malformed(card, rng):
+    kind = rng.randrange(7)
+    details = card["details"]
+    if kind == 0:
+        card["details"] = details.replace("$", "")
+    elif kind == 1:
+        card["details"] = details.rsplit(" on ", 1)[0] + f" on {rng.randint(13, 19)}/{rng.randint(32, 39)}/21"
+    elif kind == 2:
+        card["details"] = details.rsplit(" on ", 1)[0]
+    elif kind == 3:
+        card["name"] = card["name"].replace(str(card["year"]), str(rng.choice([1999, 2019, 2023])))
+    elif kind == 4:
+        card["name"] = "Audi R8 " + rng.choice(["Parts Lot", "Wheels", "Engine Cover"])
+    elif kind == 5:
+        card["details"] = ""
+    else:
+        card["details"] = details.replace(" USD", "\nUSD").replace(" on ", "\non ")
+    card["malformed"] = True
+    return card
+
+
+def generate_listings(count, seed=0, malformed_rate=0.03, years=(2006, 2020)):
+    """Cards from generate_cards with about malformed_rate of them made malformed."""
+    rng = random.Random(seed + 1)
+    cards = generate_cards(count, seed=seed, years=years)
+    for card in cards:
+        if rng.random() < malformed_rate:
+            _malformed(card, rng)
+    return cards
+
+
+def render_results_html(cards):
+    """Static results page in the listings-card markup the scraper reads."""
+    parts = ['<!DOCTYPE html>\n<html>\n<head><title>Audi R8 for Sale - Fixture</title></head>\n<body>\n'
+             '  <main>\n    <div class="listings-container auctions-grid">\n']
+    for card in cards:
+        details = "<br>".join(html.escape(line) for line in card["details"].split("\n"))
+        parts.append(
+            f'      <a class="listing-card bg-white-transparent" href="{html.escape(card["url"])}">\n'
+            f'        <div class="content-main">\n'
+            f'          <h3>{html.escape(card["name"])}</h3>\n'
+            f'          <div class="item-results">{details}</div>\n'
+            f'        </div>\n'
+            f'      </a>\n'
+        )
+    parts.append('    </div>\n  </main>\n</body>\n</html>\n')
+    return "".join(parts)
+
+
+def write_fixtures(count, seed=0, malformed_rate=0.03, out_dir=FIXTURES):
+    """Write listings-<count>.jsonl and listings-<count>.html; return their paths."""
+    cards = generate_listings(count, seed, malformed_rate)
+    os.makedirs(out_dir, exist_ok=True)
+    jsonl_path = os.path.join(out_dir, f"listings-{count}.jsonl")
+    html_path = os.path.join(out_dir, f"listings-{count}.html")
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        for card in cards:
+            f.write(json.dumps(card) + "\n")
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(render_results_html(cards))
+    return jsonl_path, html_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, action="append",
+                        help="number of cards; repeat for several sizes (default 1000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--malformed-rate", type=float, default=0.03)
+    parser.add_argument("--out-dir", default=FIXTURES)
+    args = parser.parse_args()
+
+    for count in args.count or [1000]:
+        for path in write_fixtures(count, args.seed, args.malformed_rate, args.out_dir):
+            print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Run the benchmark suite over synthetic listings and write the results as JSON
+
+Times the hot paths end to end at each fixture size: parsing listing text,
+PriceAnalyzer.process_listing, the report printers, the grouped report over
+year, engine, transmission and quarter, chart data preparation,
+bulk inserts into SQLite and predict_price against that database (cold, with
+an empty feature and model cache, then warm). Every result records the
+commit it ran on so runs can be compared across the history.
+
+    python benchmarks/run_suite.py --size 1000 --size 100000 --output results.json
+    python benchmarks/run_suite.py --compare baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "lambda"))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from generate_fixtures import generate_listings
+from chart_data import prepare_chart_data
+from config import CHART_MAX_POINTS
+from data_processor import PriceAnalyzer
+from database.models import Base
+from database.operations import bulk_store_sales
+from listing_parser import parse_listing
+from listing_store import ListingData, ListingStore
+from report_generator import DIMENSIONS, print_category_stats, print_price_extremes, store_report
+from saveCSV import parse_listing_data
+
+BENCHMARKS = ("parse_listing_data", "process_listing", "report", "group_report", "chart_data",
+              "db_bulk_insert", "predict_price_cold", "predict_price_warm")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def best_of(repeat, setup, run):
+    """Fastest of repeat runs of run(setup()); setup is not timed."""
+    best, result = None, None
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        result = run(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def sales_from(cards):
+    sales = {}
+    for card in cards:
+        if "bid to" in card["details"].lower():
+            continue
+        sale = parse_listing(card["name"], card["details"])
+        if sale:
+            sales.setdefault((sale["name"], sale["date"]), sale)
+    return list(sales.values())
+
+
+def analyzer_from(cards):
+    analyzer = PriceAnalyzer()
+    for card in cards:
+        analyzer.process_listing(ListingData(card["name"], card["details"], 0.0))
+    return analyzer
+
+
+def store_from(sales):
+    store = ListingStore()
+    for sale in sales:
+        store.append(details="", **sale)
+    return store
+
+
+def run_report(analyzer):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, manual, auto in (
+                ("All R8s", analyzer.with_manual, analyzer.without_manual),
+                ("V8 R8s", analyzer.v8_with_manual, analyzer.v8_without_manual),
+                ("V10 R8s", analyzer.v10_with_manual, analyzer.v10_without_manual)):
+            print_category_stats(label, manual, auto)
+            print_price_extremes(label, manual, auto)
+
+
+def new_database(tmp):
+    path = os.path.join(tmp, "sales.db")
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return path, sessionmaker(bind=engine)()
+
+
+def prepare_lambda(tmp, sales):
+    """SQLite database with the sales and made-up mileages, wired into the handler."""
+    import handler
+    path, session = new_database(tmp)
+    bulk_store_sales(session, sales)
+    session.execute(text("UPDATE r8_sales SET mileage = (id * 7919) % 80000 + 1000"))
+    session.commit()
+    session.close()
+    handler.set_secret_provider(lambda secret_id: {"url": f"sqlite:///{path}"})
+    return handler
+
+
+def reset_lambda(handler, tmp):
+    """An empty feature and model cache, as in a fresh container."""
+    run = os.path.join(tmp, f"cold-{time.perf_counter_ns()}")
+    handler.MODEL_DIR = os.path.join(run, "models")
+    handler.FEATURE_CACHE_DIR = os.path.join(run, "features")
+    handler._models.clear()
+    handler._feature_cache = None
+    return handler
+
+
+def run_size(size, repeat, selected, seed):
+    cards = generate_listings(size, seed=seed)
+    sales = sales_from(cards)
+    event = {"queryStringParameters": {"transmission": "manual", "engine": "v10"}}
+    results = []
+
+    def record(name, seconds, items, **extra):
+        results.append({
+            "benchmark": name,
+            "size": size,
+            "seconds": round(seconds, 6),
+            "items_per_second": round(items / seconds, 1) if seconds else None,
+            "extra": extra
+        })
+        print(f"{name:>20} {size:>9,}: {seconds:9.4f}s  {items / seconds if seconds else 0:12,.0f} items/s")
+
+    if "parse_listing_data" in selected:
+        seconds, parsed = best_of(repeat, lambda: cards,
+                                  lambda cards: sum(parse_listing_data(c["name"], c["details"]) is not None
+                                                    for c in cards))
+        record("parse_listing_data", seconds, len(cards), parsed=parsed)
+
+    analyzer = None
+    if "process_listing" in selected or "report" in selected:
+        seconds, analyzer = best_of(repeat, lambda: cards, analyzer_from)
+        if "process_listing" in selected:
+            record("process_listing", seconds, len(cards), stored=len(analyzer.store))
+
+    if "report" in selected:
+        seconds, _ = best_of(repeat, lambda: analyzer, run_report)
+        record("report", seconds, len(analyzer.store))
+
+    if "group_report" in selected:
+        seconds, report = best_of(repeat, lambda: store_from(sales),
+                                  lambda store: store_report(store, by=DIMENSIONS))
+        record("group_report", seconds, len(sales), groups=len(report.rows))
+
+    if "chart_data" in selected:
+        seconds, chart = best_of(repeat, lambda: store_from(sales),
+                                 lambda store: prepare_chart_data(store, CHART_MAX_POINTS))
+        record("chart_data", seconds, len(sales), points=len(chart.all_prices))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if "db_bulk_insert" in selected:
+            seconds, stored = best_of(repeat, lambda: new_database(tmp)[1],
+                                      lambda session: bulk_store_sales(session, sales))
+            record("db_bulk_insert", seconds, len(sales), inserted=stored.inserted)
+
+        if "predict_price_cold" in selected or "predict_price_warm" in selected:
+            handler = prepare_lambda(tmp, sales)
+            seconds, response = best_of(repeat, lambda: reset_lambda(handler, tmp),
+                                        lambda handler: handler.predict_price(event, None))
+            if "predict_price_cold" in selected:
+                record("predict_price_cold", seconds, 1, status=response["statusCode"])
+            if "predict_price_warm" in selected:
+                seconds, response = best_of(repeat, lambda: handler,
+                                            lambda handler: handler.predict_price(event, None))
+                record("predict_price_warm", seconds, 1, status=response["statusCode"])
+            handler.set_secret_provider(None)
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["benchmark"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path} (ratio > 1 is slower now):")
+    for result in results:
+        old = baseline.get((result["benchmark"], result["size"]))
+        if old and old["seconds"]:
+            print(f"{result['benchmark']:>20} {result['size']:>9,}: {result['seconds'] / old['seconds']:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, action="append",
+                        help="listings per run; repeat for several sizes (default 1000, 10000, 100000)")
+    parser.add_argument("--benchmark", action="append", choices=BENCHMARKS,
+                        help="run only these benchmarks (default all)")
+    parser.add_argument("--repeat", type=int, default=3, help="report the fastest of this many runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    selected = set(args.benchmark or BENCHMARKS)
+    results = []
+    for size in args.size or [1000, 10_000, 100_000]:
+        results.extend(run_size(size, args.repeat, selected, args.seed))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"Wrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Functions for preparing listing data for the graphs
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+import numpy as np
+from listing_store import ListingStore, MANUAL, V10
+
+# Flag combination of each variant in the price trend and box plots
+VARIANTS = {
+    'V10 Manual': MANUAL | V10,
+    'V10 Auto': V10,
+    'V8 Manual': MANUAL,
+    'V8 Auto': 0
+}
+
+@dataclass
+class ChartData:
+    # Date-ordered (dates, prices) per variant, downsampled for the scatter plot
+    trends: Dict[str, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+    # Full price arrays per variant and per transmission for the box plots
+    variant_prices: Dict[str, np.ndarray] = field(default_factory=dict)
+    manual_prices: np.ndarray = None
+    auto_prices: np.ndarray = None
+    all_prices: np.ndarray = None
+    mean_price: float = 0.0
+    median_price: float = 0.0
+
+def median(values: np.ndarray) -> float:
+    """Upper median of values, found by partial selection instead of a full sort."""
+    middle = len(values) // 2
+    return float(np.partition(values, middle)[middle])
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of a Largest-Triangle-Three-Buckets downsample of the series.
+
+    x must be sorted. The first and last points are always kept and each of
+    the threshold - 2 buckets in between contributes the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average, which preserves peaks and troughs that striding would drop.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    # Bucket averages from prefix sums; the last bucket's "next" is the final point
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = edges[1:] - edges[:-1]
+    x_means = np.append((x_sums[edges[1:]] - x_sums[edges[:-1]]) / sizes, x[-1])
+    y_means = np.append((y_sums[edges[1:]] - y_sums[edges[:-1]]) / sizes, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_x, next_y = x_means[bucket + 1], y_means[bucket + 1]
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+def prepare_chart_data(store: ListingStore, max_points: int) -> ChartData:
+    """
+    Group the store by variant in one sort and derive every graph series.
+
+    A single lexsort on (flags, date) leaves each variant as a contiguous,
+    date-ordered slice, so the per-variant series are views rather than
+    separate filtering passes. Scatter series longer than max_points are
+    reduced with LTTB; box plot and histogram inputs keep every price.
+    """
+    prices = store.prices
+    dates = store.dates
+    flags = store.flags
+
+    order = np.lexsort((dates, flags))
+    sorted_flags = flags[order]
+    sorted_dates = dates[order]
+    sorted_prices = prices[order]
+    bounds = np.searchsorted(sorted_flags, np.arange((MANUAL | V10) + 2))
+
+    data = ChartData()
+    for variant, value in VARIANTS.items():
+        rows = slice(bounds[value], bounds[value + 1])
+        variant_dates = sorted_dates[rows]
+        variant_prices = sorted_prices[rows]
+        data.variant_prices[variant] = variant_prices
+        if len(variant_dates):
+            keep = lttb(variant_dates.astype(np.int64), variant_prices, max_points)
+            data.trends[variant] = (variant_dates[keep], variant_prices[keep])
+
+    manual = (sorted_flags & MANUAL).astype(bool)
+    data.manual_prices = sorted_prices[manual]
+    data.auto_prices = sorted_prices[~manual]
+    data.all_prices = prices
+    if len(prices):
+        data.mean_price = float(prices.mean())
+        data.median_price = median(prices)
+    return data
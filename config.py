@@ -2,12 +2,74 @@
 """
 Configuration settings for the web scraping application
 """
-from selenium.webdriver.chrome.options import Options
+import os
 
 def get_chrome_options():
+    # Selenium is imported only once a browser is actually started
+    from selenium.webdriver.chrome.options import Options
     options = Options()
     options.add_experimental_option("detach", True)
     return options
 
+def get_headless_chrome_options():
+    from selenium.webdriver.chrome.options import Options
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return options
+
 BASE_URL = "https://bringatrailer.com/audi/r8/"
-MAX_YEAR = "2015"
\ No newline at end of file
+MIN_YEAR = "2008"
+MAX_YEAR = "2015"
+
+# Where saveCSV writes its CSV export; the GUI loads it (or the Parquet dataset) on launch
+CSV_EXPORT_PATH = os.path.join("carData", "AudiR8", "audi_r8_data.csv")
+
+# How listing cards are read once loaded: "script" (one execute_script call),
+# "snapshot" (parse page_source) or "elements" (two find_element calls per card)
+EXTRACTION_MODE = "script"
+
+# "Show More" pagination: poll the card count starting at POLL_INTERVAL seconds,
+# backing off by BACKOFF up to MAX_POLL_INTERVAL; give up on a page after PAGE_TIMEOUT,
+# and treat a button still disabled after SETTLE_TIMEOUT with no new cards as the end of the list
+PAGINATION_POLL_INTERVAL = 0.05
+PAGINATION_MAX_POLL_INTERVAL = 1.0
+PAGINATION_BACKOFF = 1.5
+PAGINATION_PAGE_TIMEOUT = 10
+PAGINATION_SETTLE_TIMEOUT = 1.0
+
+# Warm browser pool: cached chromedriver path and maximum number of live browsers
+DRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "powertrain-tracker", "chromedriver.json")
+DRIVER_POOL_SIZE = 2
+
+# Parallel crawl: worker processes, and politeness limits shared by all of them
+CRAWL_WORKERS = 4
+CRAWL_MIN_REQUEST_INTERVAL = 0.5
+CRAWL_MAX_PER_HOST = 4
+
+# Graphs: scatter series longer than this are downsampled (LTTB) before plotting
+CHART_MAX_POINTS = 2000
+
+# Live graphs during a crawl are redrawn at most this many times per second
+LIVE_CHART_FPS = 4
+
+# UI updates from worker threads are batched and flushed every FLUSH_INTERVAL_MS;
+# text widgets keep at most MAX_TEXT_CHARS characters
+UI_FLUSH_INTERVAL_MS = 100
+UI_MAX_TEXT_CHARS = 200_000
+
+# Browserless HTTP backend: the site's paged JSON listings endpoint, requests in flight at once,
+# per-request timeout in seconds and retries for throttled or failed requests
+LISTINGS_API_PATH = "/wp-json/bringatrailer/1.0/data/listings-filter"
+HTTP_MAX_CONCURRENCY = 4
+HTTP_TIMEOUT = 20
+HTTP_RETRIES = 2
+# "auto" reads listings over HTTP and only starts Chrome if that fails; "http" or "selenium" forces one
+FETCH_BACKEND = "auto"
+
+# Detail-page enrichment: pages fetched at once, and the on-disk response cache. Cached pages
+# younger than DETAIL_CACHE_MAX_AGE seconds are used without asking the site; older ones are revalidated
+DETAIL_MAX_CONCURRENCY = 4
+DETAIL_CACHE_DIR = os.path.join("carData", "AudiR8", "http_cache")
+DETAIL_CACHE_MAX_AGE = 7 * 24 * 3600
@@ -1,17 +1,34 @@
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, Boolean
+from sqlalchemy import create_engine, Column, Integer, Float, String, Date, DateTime, Boolean, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
 class AudiR8Sale(Base):
     __tablename__ = 'r8_sales'
+    # A sale is identified by its listing and sale date, so re-scrapes upsert instead of duplicating
+    __table_args__ = (UniqueConstraint('listing_name', 'sale_date', name='uq_r8_sales_listing_date'),)
     
     id = Column(Integer, primary_key=True)
     listing_name = Column(String)
     sale_price = Column(Float)
-    sale_date = Column(DateTime)
+    sale_date = Column(DateTime, index=True)
     year = Column(Integer)
     is_manual = Column(Boolean)
     is_v10 = Column(Boolean)
     mileage = Column(Integer)
-    created_at = Column(DateTime)
\ No newline at end of file
+    # Stamped on insert and again whenever an upsert changes the row, so delta syncs refetch it
+    created_at = Column(DateTime)
+
+class DailySalesRollup(Base):
+    # Per-day, per-variant price aggregates of r8_sales, kept current by database.operations
+    __tablename__ = 'r8_sales_daily'
+
+    sale_day = Column(Date, primary_key=True)
+    is_manual = Column(Boolean, primary_key=True)
+    is_v10 = Column(Boolean, primary_key=True)
+    year = Column(Integer, primary_key=True)
+    sale_count = Column(Integer, nullable=False)
+    price_sum = Column(Float, nullable=False)
+    price_min = Column(Float, nullable=False)
+    price_max = Column(Float, nullable=False)
+    price_sum_sq = Column(Float, nullable=False)
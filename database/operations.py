@@ -1,15 +1,131 @@
+from sqlalchemy import insert, update
 from sqlalchemy.orm import sessionmaker
+from dataclasses import dataclass
 from datetime import datetime
+from database.models import AudiR8Sale
+from database.rollup import add_to_rollup, refresh_rollup_days
+
+# Sales written per transaction by bulk_store_sales
+DEFAULT_BATCH_SIZE = 1000
+
+# Columns a re-scraped sale may change; the (listing_name, sale_date) key never does
+UPDATABLE_COLUMNS = ('sale_price', 'year', 'is_manual', 'is_v10')
+
+@dataclass
+class BulkStoreResult:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+def _sale_date(sale_data):
+    # saveCSV rows carry the date as YYYY-MM-DD text
+    date = sale_data['date']
+    return datetime.strptime(date, "%Y-%m-%d") if isinstance(date, str) else date
 
 def store_sale(session, sale_data):
-    new_sale = AudiR8Sale(
-        listing_name=sale_data['name'],
-        sale_price=sale_data['price'],
-        sale_date=sale_data['date'],
-        year=sale_data['year'],
-        is_manual=sale_data['is_manual'],
-        is_v10=sale_data['is_v10'],
-        created_at=datetime.now()
-    )
-    session.add(new_sale)
-    session.commit()
\ No newline at end of file
+    row = _sale_row(sale_data, datetime.now())
+    session.add(AudiR8Sale(**row))
+    add_to_rollup(session, [row])
+    session.commit()
+
+def store_new_sales(session, sales):
+    """Store only sales whose (name, date) is not in the table yet, in one commit."""
+    sales = list(sales)
+    names = {sale['name'] for sale in sales}
+    existing = set(
+        session.query(AudiR8Sale.listing_name, AudiR8Sale.sale_date)
+        .filter(AudiR8Sale.listing_name.in_(names))
+    ) if names else set()
+
+    created_at = datetime.now()
+    new_sales = []
+    for sale_data in sales:
+        key = (sale_data['name'], _sale_date(sale_data))
+        if key not in existing:
+            existing.add(key)
+            new_sales.append(_sale_row(sale_data, created_at))
+    session.add_all([AudiR8Sale(**row) for row in new_sales])
+    add_to_rollup(session, new_sales)
+    session.commit()
+    return len(new_sales)
+
+def _sale_row(sale_data, created_at):
+    return {
+        'listing_name': sale_data['name'],
+        'sale_price': sale_data['price'],
+        'sale_date': _sale_date(sale_data),
+        'year': sale_data['year'],
+        'is_manual': sale_data['is_manual'],
+        'is_v10': sale_data['is_v10'],
+        'mileage': sale_data.get('mileage'),
+        'created_at': created_at
+    }
+
+def _store_batch(session, rows, result):
+    # Later duplicates of a key within the batch win, earlier ones are skipped
+    by_key = {}
+    for row in rows:
+        by_key[(row['listing_name'], row['sale_date'])] = row
+    result.skipped += len(rows) - len(by_key)
+
+    # Batches are in date order, so each name is a short range of the unique constraint's index
+    names = {name for name, _ in by_key}
+    dates = [date for _, date in by_key]
+    existing = {}
+    for sale in session.query(
+        AudiR8Sale.id, AudiR8Sale.listing_name, AudiR8Sale.sale_date, AudiR8Sale.mileage,
+        *(getattr(AudiR8Sale, c) for c in UPDATABLE_COLUMNS)
+    ).filter(AudiR8Sale.listing_name.in_(names),
+             AudiR8Sale.sale_date.between(min(dates), max(dates))):
+        existing[(sale.listing_name, sale.sale_date)] = sale
+
+    inserts, updates, updated_keys = [], [], []
+    for key, row in by_key.items():
+        sale = existing.get(key)
+        if sale is None:
+            inserts.append(row)
+            continue
+        # Mileage comes from detail-page enrichment, so a sale scraped without it keeps the stored value
+        mileage = sale.mileage if row['mileage'] is None else row['mileage']
+        changed = any(getattr(sale, column) != row[column] for column in UPDATABLE_COLUMNS)
+        if changed or mileage != sale.mileage:
+            # A new created_at is what the Lambda feature cache's delta sync picks changed rows up by
+            updates.append({'id': sale.id, 'mileage': mileage, 'created_at': row['created_at'],
+                            **{column: row[column] for column in UPDATABLE_COLUMNS}})
+            if changed:
+                updated_keys.append(key)
+        else:
+            result.skipped += 1
+
+    # Each is a single executemany rather than one statement per sale
+    if inserts:
+        session.execute(insert(AudiR8Sale), inserts)
+        add_to_rollup(session, inserts)
+    if updates:
+        session.execute(update(AudiR8Sale), updates)
+    if updated_keys:
+        refresh_rollup_days(session, {key[1].date() for key in updated_keys})
+    result.inserted += len(inserts)
+    result.updated += len(updates)
+
+def bulk_store_sales(session, sales, batch_size=DEFAULT_BATCH_SIZE) -> BulkStoreResult:
+    """
+    Upsert parsed sales on their (listing_name, sale_date) key.
+
+    Sales are sorted by date and written batch_size at a time, one
+    transaction per batch: new keys are inserted, existing keys whose
+    price, year or flags changed, or that gain a mileage, are updated
+    and restamped with this run's created_at, and unchanged or repeated
+    sales are skipped.
+    """
+    result = BulkStoreResult()
+    created_at = datetime.now()
+    # Date order keeps each batch to a few sale days, which keeps both the
+    # key lookup and the rollup update small. The sort is stable, so a
+    # repeated sale still resolves to its last occurrence.
+    rows = sorted((_sale_row(sale_data, created_at) for sale_data in sales),
+                  key=lambda row: (row['sale_date'], row['listing_name']))
+    for start in range(0, len(rows), batch_size):
+        _store_batch(session, rows[start:start + batch_size], result)
+        session.commit()
+    return result
@@ -0,0 +1,181 @@
+"""
+Functions for maintaining the daily per-variant rollup of r8_sales
+
+    python -m database.rollup rebuild --db-url sqlite:///sales.db
+    python -m database.rollup check --db-url sqlite:///sales.db
+"""
+import argparse
+import math
+import os
+import sys
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, delete, func, insert, update
+from sqlalchemy.orm import sessionmaker
+from database.models import Base, AudiR8Sale, DailySalesRollup
+
+KEY_COLUMNS = ('sale_day', 'is_manual', 'is_v10', 'year')
+AGGREGATE_COLUMNS = ('sale_count', 'price_sum', 'price_min', 'price_max', 'price_sum_sq')
+
+def rollup_key(sale_row):
+    """Rollup key of an r8_sales row given as a column dict; a missing year buckets as 0."""
+    return (sale_row['sale_date'].date(), bool(sale_row['is_manual']),
+            bool(sale_row['is_v10']), sale_row['year'] or 0)
+
+def _as_date(value):
+    # SQLite's date() returns text, Postgres returns a date
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def _aggregate_raw(session, first_day=None, last_day=None):
+    """Rollup rows computed from r8_sales, optionally for sale days in [first_day, last_day]."""
+    day = func.date(AudiR8Sale.sale_date)
+    query = session.query(
+        day, AudiR8Sale.is_manual, AudiR8Sale.is_v10, func.coalesce(AudiR8Sale.year, 0),
+        func.count(), func.sum(AudiR8Sale.sale_price), func.min(AudiR8Sale.sale_price),
+        func.max(AudiR8Sale.sale_price), func.sum(AudiR8Sale.sale_price * AudiR8Sale.sale_price)
+    ).filter(AudiR8Sale.sale_price.isnot(None), AudiR8Sale.sale_date.isnot(None))
+    if first_day is not None:
+        query = query.filter(AudiR8Sale.sale_date >= datetime.combine(first_day, datetime.min.time()),
+                             AudiR8Sale.sale_date < datetime.combine(last_day + timedelta(days=1), datetime.min.time()))
+    query = query.group_by(day, AudiR8Sale.is_manual, AudiR8Sale.is_v10, func.coalesce(AudiR8Sale.year, 0))
+    rollup = {}
+    for sale_day, is_manual, is_v10, year, *aggregates in query:
+        rollup[(_as_date(sale_day), bool(is_manual), bool(is_v10), year)] = tuple(aggregates)
+    return rollup
+
+def _stored(session, days):
+    rollup = {}
+    query = session.query(*(getattr(DailySalesRollup, c) for c in KEY_COLUMNS + AGGREGATE_COLUMNS))
+    if days is not None:
+        query = query.filter(DailySalesRollup.sale_day.in_(days))
+    for row in query:
+        rollup[tuple(row[:len(KEY_COLUMNS)])] = tuple(row[len(KEY_COLUMNS):])
+    return rollup
+
+def _write(session, stored, changes):
+    inserts, updates = [], []
+    for key, aggregates in changes.items():
+        values = dict(zip(KEY_COLUMNS, key), **dict(zip(AGGREGATE_COLUMNS, aggregates)))
+        (updates if key in stored else inserts).append(values)
+    if inserts:
+        session.execute(insert(DailySalesRollup), inserts)
+    if updates:
+        session.execute(update(DailySalesRollup), updates)
+
+def add_to_rollup(session, rows):
+    """
+    Fold newly inserted r8_sales rows (column dicts) into the rollup.
+
+    Only the touched days are read and written, and nothing is committed,
+    so the caller's ingestion transaction covers both tables.
+    """
+    added = {}
+    for row in rows:
+        price = row['sale_price']
+        if price is None or row['sale_date'] is None:
+            continue
+        key = rollup_key(row)
+        count, total, low, high, total_sq = added.get(key, (0, 0.0, math.inf, -math.inf, 0.0))
+        added[key] = (count + 1, total + price, min(low, price), max(high, price), total_sq + price * price)
+    if not added:
+        return
+
+    stored = _stored(session, {key[0] for key in added})
+    changes = {}
+    for key, (count, total, low, high, total_sq) in added.items():
+        if key in stored:
+            old_count, old_total, old_low, old_high, old_sq = stored[key]
+            changes[key] = (old_count + count, old_total + total, min(old_low, low),
+                            max(old_high, high), old_sq + total_sq)
+        else:
+            changes[key] = (count, total, low, high, total_sq)
+    _write(session, stored, changes)
+
+def refresh_rollup_days(session, days):
+    """
+    Recompute the rollup for whole sale days from r8_sales.
+
+    Used after updates, where a bucket's min or max cannot be adjusted
+    incrementally. Buckets left with no sales are deleted.
+    """
+    days = set(days)
+    if not days:
+        return
+    session.flush()
+    fresh = {key: aggregates for key, aggregates in _aggregate_raw(session, min(days), max(days)).items()
+             if key[0] in days}
+    stored = _stored(session, days)
+    _write(session, stored, fresh)
+    for key in stored.keys() - fresh.keys():
+        session.execute(delete(DailySalesRollup).filter_by(**dict(zip(KEY_COLUMNS, key))))
+
+def rebuild_rollup(session):
+    """Replace the whole rollup with aggregates of r8_sales, in one transaction."""
+    session.execute(delete(DailySalesRollup))
+    fresh = _aggregate_raw(session)
+    _write(session, {}, fresh)
+    session.commit()
+    return len(fresh)
+
+def check_rollup(session, rel_tol=1e-9):
+    """Return (key, stored, expected) for every rollup bucket that disagrees with r8_sales."""
+    expected = _aggregate_raw(session)
+    stored = _stored(session, None)
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        want, have = expected.get(key), stored.get(key)
+        if want is None or have is None or not all(
+            math.isclose(a, b, rel_tol=rel_tol) for a, b in zip(have, want)
+        ):
+            mismatches.append((key, have, want))
+    return mismatches
+
+def variant_summary(session):
+    """{(is_manual, is_v10): (count, mean, min, max, std)} from the rollup alone."""
+    r = DailySalesRollup
+    query = session.query(
+        r.is_manual, r.is_v10, func.sum(r.sale_count), func.sum(r.price_sum),
+        func.min(r.price_min), func.max(r.price_max), func.sum(r.price_sum_sq)
+    ).group_by(r.is_manual, r.is_v10)
+    summary = {}
+    for is_manual, is_v10, count, total, low, high, total_sq in query:
+        mean = total / count
+        variance = (total_sq - count * mean * mean) / (count - 1) if count > 1 else 0.0
+        summary[(bool(is_manual), bool(is_v10))] = (count, mean, low, high, math.sqrt(max(variance, 0.0)))
+    return summary
+
+def daily_averages(session, is_manual=None, is_v10=None):
+    """[(sale_day, count, average price)] in date order, optionally for one variant."""
+    r = DailySalesRollup
+    query = session.query(r.sale_day, func.sum(r.sale_count), func.sum(r.price_sum))
+    if is_manual is not None:
+        query = query.filter(r.is_manual == is_manual)
+    if is_v10 is not None:
+        query = query.filter(r.is_v10 == is_v10)
+    return [(day, count, total / count) for day, count, total in query.group_by(r.sale_day).order_by(r.sale_day)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild or check the r8_sales daily rollup")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--db-url", default=os.environ.get("DATABASE_URL"),
+                        help="SQLAlchemy URL of the sales database (default: $DATABASE_URL)")
+    args = parser.parse_args(argv)
+    if not args.db_url:
+        parser.error("--db-url or DATABASE_URL is required")
+
+    engine = create_engine(args.db_url)
+    Base.metadata.create_all(engine, tables=[DailySalesRollup.__table__])
+    session = sessionmaker(bind=engine)()
+    try:
+        if args.command == "rebuild":
+            print(f"Rebuilt rollup: {rebuild_rollup(session)} buckets")
+            return 0
+        mismatches = check_rollup(session)
+        for key, have, want in mismatches[:20]:
+            print(f"{key}: rollup {have}, raw {want}")
+        print(f"{len(mismatches)} mismatched buckets")
+        return 1 if mismatches else 0
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,152 @@
 """
 Setup for the Chrome WebDriver
 """
+import atexit
+import json
+import os
+import threading
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
-from config import get_chrome_options
+from config import get_chrome_options, get_headless_chrome_options, DRIVER_CACHE_FILE, DRIVER_POOL_SIZE
 
-def initialize_driver():
-    options = get_chrome_options()
+def get_driver_path(refresh=False):
+    """
+    Return the chromedriver binary path, resolving it with webdriver_manager
+    only when no cached path exists, so warm starts work offline.
+    CHROMEDRIVER_PATH in the environment overrides both.
+    """
+    if os.environ.get("CHROMEDRIVER_PATH"):
+        return os.environ["CHROMEDRIVER_PATH"]
+
+    if not refresh and os.path.exists(DRIVER_CACHE_FILE):
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            path = json.load(f).get("path")
+        if path and os.path.exists(path):
+            return path
+
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+    with open(DRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"path": path}, f)
+    return path
+
+def initialize_driver(options=None):
     driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
+        service=Service(get_driver_path()),
+        options=options or get_chrome_options()
     )
     return driver
 
+class DriverPool:
+    """
+    Keeps up to max_size headless browsers alive between scrape runs.
+
+    Drivers are leased with `with pool.lease() as driver:`; on release their
+    cookies and storage are cleared and they are parked on about:blank.
+    Idle drivers are health-checked before being handed out again and
+    replaced if the browser has died.
+    """
+
+    def __init__(self, max_size=DRIVER_POOL_SIZE, options_factory=get_headless_chrome_options):
+        self.max_size = max_size
+        self.options_factory = options_factory
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def acquire(self, timeout=None):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                while self._idle:
+                    driver = self._idle.pop()
+                    if self._is_healthy(driver):
+                        return driver
+                    self._discard(driver)
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                if not self._condition.wait(timeout):
+                    raise TimeoutError(f"No browser free in pool of {self.max_size}")
+
+        # Start the browser outside the lock so other leases are not blocked
+        try:
+            return initialize_driver(self.options_factory())
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, driver):
+        healthy = self._reset(driver)
+        with self._condition:
+            if healthy and not self._closed:
+                self._idle.append(driver)
+            else:
+                self._discard(driver)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._condition.notify_all()
+
+    def _discard(self, driver):
+        self._size -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        try:
+            # Close any extra tabs a run left open
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            # Clears cookies for every domain, not just the current page's
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    """Return the process-wide driver pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+            atexit.register(_pool.close)
+        return _pool
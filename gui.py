@@ -2,10 +2,10 @@
 GUI implementation for the Audi R8 price analysis application
 """
 import tkinter as tk
-from tkinter import ttk, scrolledtext
+from tkinter import ttk
 import threading
-from typing import List, Tuple
-from data_processor import ListingData
+from listing_store import CategoryView
+from listings_table import ListingsTable
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
@@ -82,6 +82,7 @@ class AnalysisGUI:
 
     def create_stat_labels(self, frame):
         labels = ['Total Manual:', 'Total Auto:', 'Avg Manual Price:', 'Avg Auto Price:',
+                 'Median Manual Price:', 'Median Auto Price:',
                  'Manual Price Range:', 'Auto Price Range:']
         
         for i, label in enumerate(labels):
@@ -89,9 +90,9 @@ class AnalysisGUI:
             ttk.Label(frame, text="---").grid(row=i//2, column=i%2*2+1, padx=5, pady=2, sticky='w')
 
     def setup_details_tab(self):
-        # Create text widget for detailed listings
-        self.details_text = scrolledtext.ScrolledText(self.details_tab, wrap=tk.WORD, height=40)
-        self.details_text.pack(expand=True, fill='both', padx=10, pady=5)
+        # Virtualized table of listings, filtered by category instead of re-rendered
+        self.listings_table = ListingsTable(self.details_tab)
+        self.listings_table.pack(expand=True, fill='both', padx=10, pady=5)
 
     def setup_graphs_tab(self):
         # Create matplotlib figure
@@ -121,8 +122,8 @@ class AnalysisGUI:
             analyzer.v8_without_manual
         )
 
-    def update_section_stats(self, frame, manual_data: List[Tuple[ListingData, float]], 
-                           auto_data: List[Tuple[ListingData, float]]):
+    def update_section_stats(self, frame, manual_data: CategoryView, 
+                           auto_data: CategoryView):
         labels = frame.winfo_children()
         
         # Update statistics
@@ -131,6 +132,8 @@ class AnalysisGUI:
             str(len(auto_data)),
             f"${self.calculate_average(manual_data):,.2f}",
             f"${self.calculate_average(auto_data):,.2f}",
+            self.get_median(manual_data),
+            self.get_median(auto_data),
             f"${self.get_price_range(manual_data)}",
             f"${self.get_price_range(auto_data)}"
         ]
@@ -141,24 +144,7 @@ class AnalysisGUI:
             label.configure(text=stat)
 
     def update_details(self, analyzer):
-        self.details_text.delete(1.0, tk.END)
-        
-        categories = [
-            ("Manual Transmission Listings", analyzer.with_manual),
-            ("Automatic Transmission Listings", analyzer.without_manual),
-            ("V10 Manual Transmission Listings", analyzer.v10_with_manual),
-            ("V10 Automatic Transmission Listings", analyzer.v10_without_manual),
-            ("V8 Manual Transmission Listings", analyzer.v8_with_manual),
-            ("V8 Automatic Transmission Listings", analyzer.v8_without_manual)
-        ]
-        
-        for title, listings in categories:
-            self.details_text.insert(tk.END, f"\n{title}\n")
-            self.details_text.insert(tk.END, "="*50 + "\n")
-            for listing, price in listings:
-                self.details_text.insert(tk.END, f"{listing.name}\n")
-                self.details_text.insert(tk.END, f"Price: ${price:,.2f}\n")
-                self.details_text.insert(tk.END, f"{listing.details}\n\n")
+        self.listings_table.set_store(analyzer.store)
 
     def update_graphs(self, analyzer):
         self.figure.clear()
@@ -193,8 +179,8 @@ class AnalysisGUI:
         ax1.legend()
         
         # Distribution plot
-        all_manual_prices = [price for _, price in analyzer.with_manual]
-        all_auto_prices = [price for _, price in analyzer.without_manual]
+        all_manual_prices = analyzer.with_manual.prices
+        all_auto_prices = analyzer.without_manual.prices
         
         ax2.hist(all_manual_prices, bins=20, alpha=0.5, label='Manual')
         ax2.hist(all_auto_prices, bins=20, alpha=0.5, label='Automatic')
@@ -207,14 +193,17 @@ class AnalysisGUI:
         self.canvas.draw()
 
     @staticmethod
-    def calculate_average(listings: List[Tuple[ListingData, float]]) -> float:
-        if not listings:
-            return 0
-        return sum(price for _, price in listings) / len(listings)
+    def calculate_average(listings: CategoryView) -> float:
+        return listings.mean()
+
+    @staticmethod
+    def get_median(listings: CategoryView) -> str:
+        if not len(listings):
+            return "No data"
+        return f"${listings.median():,.2f}"
 
     @staticmethod
-    def get_price_range(listings: List[Tuple[ListingData, float]]) -> str:
-        if not listings:
+    def get_price_range(listings: CategoryView) -> str:
+        if not len(listings):
             return "No data"
-        prices = [price for _, price in listings]
-        return f"{min(prices):,.2f} - ${max(prices):,.2f}"
+        return f"{listings.min():,.2f} - ${listings.max():,.2f}"
@@ -0,0 +1,84 @@
+"""
+Functions for caching HTTP responses on disk
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+class HttpCache:
+    """
+    Content-addressed store of response bodies with an index of validators.
+
+    Bodies live under objects/<sha256[:2]>/<sha256>, so identical pages are
+    stored once and an entry can never point at a half-written file.
+    index.json maps each URL to its body's digest, ETag, Last-Modified and
+    the time it was last fetched or revalidated. Call save() to persist
+    the index.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        index_path = os.path.join(path, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def _object_path(self, digest):
+        return os.path.join(self.path, "objects", digest[:2], digest)
+
+    def get(self, url) -> Optional[dict]:
+        """The index entry for url, or None if it is not cached or its body is missing."""
+        entry = self.index.get(url)
+        if entry and os.path.exists(self._object_path(entry["sha256"])):
+            return entry
+        return None
+
+    def is_fresh(self, entry, max_age):
+        return time.time() - entry["fetched"] < max_age
+
+    def body(self, entry) -> bytes:
+        with open(self._object_path(entry["sha256"]), "rb") as f:
+            return f.read()
+
+    def conditional_headers(self, entry):
+        """If-None-Match / If-Modified-Since headers that revalidate entry."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, body: bytes, headers):
+        """Record a 200 response; returns its index entry."""
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, object_path)
+        entry = {
+            "sha256": digest,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched": time.time()
+        }
+        self.index[url] = entry
+        return entry
+
+    def touch(self, url):
+        """Mark url's entry as just revalidated (a 304 response)."""
+        self.index[url]["fetched"] = time.time()
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        index_path = os.path.join(self.path, "index.json")
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, index_path)
@@ -0,0 +1,145 @@
+"""
+Functions for reading listing cards over HTTP without a browser
+"""
+import asyncio
+import html
+import json
+import re
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+import aiohttp
+from config import (
+    BASE_URL, MIN_YEAR, MAX_YEAR, LISTINGS_API_PATH,
+    HTTP_MAX_CONCURRENCY, HTTP_TIMEOUT, HTTP_RETRIES
+)
+from page_parser import normalize_text
+from run_metrics import RunMetrics
+
+# The results page embeds its first page of listings and the filter that selects the model
+INITIAL_DATA_PATTERN = re.compile(r"auctionsCompletedInitialData\s*=\s*(\{.*?\})\s*;?\s*</script>", re.S)
+_TAGS = re.compile(r"<[^>]+>")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) powertrain-tracker", "Accept-Encoding": "gzip"}
+
+class ListingFetchError(Exception):
+    """The listings could not be read over HTTP; callers fall back to the browser."""
+
+def initial_data(page_html):
+    match = INITIAL_DATA_PATTERN.search(page_html)
+    if not match:
+        raise ListingFetchError("No embedded listings data on the results page")
+    try:
+        return json.loads(match.group(1))
+    except ValueError as e:
+        raise ListingFetchError(f"Embedded listings data is not JSON: {e}")
+
+def item_row(item) -> Optional[Tuple[str, str]]:
+    """(name, details) as the card shows them, or None for an item missing either."""
+    title, sold_text = item.get("title"), item.get("sold_text")
+    if not title or sold_text is None:
+        return None
+    return normalize_text(html.unescape(title)), normalize_text(html.unescape(_TAGS.sub(" ", sold_text)))
+
+def _filter_params(base_filter):
+    # The endpoint takes the filter PHP-style, as base_filter[key]=value
+    return [(f"base_filter[{key}]", str(value)) for key, value in base_filter.items()]
+
+class HttpListingFetcher:
+    """
+    Reads every page of listing cards from the site's JSON listings endpoint
+    with one pooled aiohttp session, so no browser is started.
+
+    The results page is fetched once for the model filter it embeds; page 1
+    of the year-filtered listings gives the page count, and the remaining
+    pages are requested concurrently, at most `concurrency` at a time, but
+    handed to on_page in order. Throttled or failed requests are retried
+    with backoff; anything else unexpected raises ListingFetchError.
+    """
+
+    def __init__(self, base_url=BASE_URL, min_year=MIN_YEAR, max_year=MAX_YEAR,
+                 concurrency=HTTP_MAX_CONCURRENCY, timeout=HTTP_TIMEOUT, retries=HTTP_RETRIES, metrics=None):
+        self.base_url = base_url
+        self.api_url = urljoin(base_url, LISTINGS_API_PATH)
+        self.min_year = min_year
+        self.max_year = max_year
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.metrics = metrics or RunMetrics()
+
+    async def _get(self, session, url, params=None):
+        delay = 0.5
+        for attempt in range(self.retries + 1):
+            self.metrics.count("http.requests")
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status in RETRY_STATUSES:
+                        error = f"HTTP {response.status}"
+                    elif response.status >= 400:
+                        raise ListingFetchError(f"GET {url} returned HTTP {response.status}")
+                    else:
+                        return await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+            if attempt < self.retries:
+                self.metrics.count("http.retries")
+                await asyncio.sleep(delay)
+                delay *= 2
+        raise ListingFetchError(f"GET {url} failed after {self.retries + 1} attempts ({error})")
+
+    async def _page(self, session, slots, page, base_filter, per_page, urls=None):
+        params = [("page", str(page)), ("per_page", str(per_page)), ("get_items", "1"),
+                  ("get_stats", "0"), ("sort", "td"),
+                  ("minimum_year", str(self.min_year)), ("maximum_year", str(self.max_year))]
+        async with slots:
+            with self.metrics.span("fetch_page") as span:
+                body = await self._get(session, self.api_url, params + _filter_params(base_filter))
+                try:
+                    data = json.loads(body)
+                    items = [(item, item_row(item)) for item in data["items"]]
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    raise ListingFetchError(f"Unexpected listings response for page {page}: {e!r}")
+                span["items"] = len(items)
+        rows = [row for _, row in items if row]
+        if urls is not None:
+            urls.update((row, urljoin(self.base_url, item["url"])) for item, row in items if row and item.get("url"))
+        return rows, int(data.get("pages_total") or 1)
+
+    async def load_all(self, on_page=None, urls=None) -> List[List[Tuple[str, str]]]:
+        """
+        Return every page of (name, details) pairs. If on_page is given it is
+        called with each page in order; returning True stops early and cancels
+        the pages still in flight. urls, if given, maps each pair to its
+        listing's detail page.
+        """
+        pages = []
+        slots = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+            with self.metrics.span("fetch_index"):
+                data = initial_data(await self._get(session, self.base_url))
+            base_filter = data.get("base_filter") or {}
+            per_page = int(data.get("per_page") or len(data.get("items") or ()) or 24)
+
+            first, pages_total = await self._page(session, slots, 1, base_filter, per_page, urls)
+            tasks = [asyncio.ensure_future(self._page(session, slots, page, base_filter, per_page, urls))
+                     for page in range(2, pages_total + 1)]
+            try:
+                for next_page in [None] + tasks:
+                    page = first if next_page is None else (await next_page)[0]
+                    pages.append(page)
+                    self.metrics.count("pages")
+                    self.metrics.count("cards", len(page))
+                    if on_page is not None and on_page(page):
+                        print("Reached already-known listings, stopping pagination")
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return pages
+
+def load_all_listings_http(on_page=None, urls=None, **fetcher_options):
+    """Blocking HttpListingFetcher.load_all; see there. Returns the pages."""
+    return asyncio.run(HttpListingFetcher(**fetcher_options).load_all(on_page=on_page, urls=urls))
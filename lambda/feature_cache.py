@@ -0,0 +1,140 @@
+import json
+import os
+
+# Columns the price model needs, plus the id and created_at the delta sync tracks
+FEATURE_COLUMNS = ('id', 'sale_price', 'sale_date', 'mileage', 'is_manual', 'is_v10', 'created_at')
+# Delta part files are folded into one once there are more than this many
+MAX_PARTS = 16
+
+DELTA_QUERY = """
+SELECT id, sale_price, sale_date, mileage, is_manual, is_v10, created_at
+FROM r8_sales
+WHERE created_at >= :watermark
+"""
+FULL_QUERY = """
+SELECT id, sale_price, sale_date, mileage, is_manual, is_v10, created_at
+FROM r8_sales
+"""
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('id', pa.int64()),
+        ('sale_price', pa.float64()),
+        ('sale_date', pa.timestamp('us')),
+        ('mileage', pa.float64()),
+        ('is_manual', pa.bool_()),
+        ('is_v10', pa.bool_()),
+        ('created_at', pa.timestamp('us'))
+    ])
+
+def _latest_by_id(table):
+    # Parts are in sync order, so the last row with an id is its newest version
+    import numpy as np
+    ids = table['id'].to_numpy()
+    _, last = np.unique(ids[::-1], return_index=True)
+    if len(last) == len(ids):
+        return table
+    return table.take(np.sort(len(ids) - 1 - last))
+
+class FeatureCache:
+    """
+    Local Parquet copy of the r8_sales feature columns, kept current by
+    fetching only rows created since the last sync.
+
+    Each sync that finds new rows writes them as one Parquet part file and
+    advances a created_at watermark in manifest.json. Rows created exactly
+    at the watermark are fetched again and dropped by id, since one bulk
+    write stamps many rows with the same created_at across several commits.
+    Parts are memory-mapped on read, and the combined table is kept in
+    memory until the next sync adds a part. database.operations restamps
+    created_at on rows it updates, so a changed row is fetched again and
+    its newest copy replaces the older ones with the same id.
+    """
+
+    def __init__(self, path, read_sql):
+        self.path = path
+        self.read_sql = read_sql
+        self.manifest = {'watermark': None, 'watermark_ids': [], 'parts': [], 'rows': 0}
+        manifest_path = os.path.join(path, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        self._table = None
+
+    def sync(self):
+        """Fetch rows newer than the watermark and append them; returns the number added."""
+        import pandas as pd
+        watermark = self.manifest['watermark']
+        if watermark is None:
+            new = self.read_sql(FULL_QUERY, parse_dates=['sale_date', 'created_at'])
+        else:
+            new = self.read_sql(DELTA_QUERY, params={'watermark': pd.Timestamp(watermark).to_pydatetime()},
+                                parse_dates=['sale_date', 'created_at'])
+            # Only copies still stamped at the watermark are repeats; a restamped row is newer
+            seen = (new['created_at'] == pd.Timestamp(watermark)) & new['id'].isin(self.manifest['watermark_ids'])
+            new = new[~seen]
+        if new.empty:
+            return 0
+
+        self._append(new)
+        latest = new['created_at'].max()
+        if pd.notna(latest):
+            if watermark is not None and latest == pd.Timestamp(watermark):
+                seen = self.manifest['watermark_ids']
+            else:
+                seen = []
+            self.manifest['watermark'] = latest.isoformat()
+            self.manifest['watermark_ids'] = seen + new.loc[new['created_at'] == latest, 'id'].tolist()
+        self.manifest['rows'] += len(new)
+        if len(self.manifest['parts']) > MAX_PARTS:
+            self._compact()
+        self._save_manifest()
+        return len(new)
+
+    def _write_part(self, table):
+        import pyarrow.parquet as pq
+        os.makedirs(self.path, exist_ok=True)
+        name = f"part-{self.manifest['rows'] + table.num_rows:012d}-{len(self.manifest['parts']):04d}.parquet"
+        pq.write_table(table, os.path.join(self.path, name))
+        return name
+
+    def _append(self, frame):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(frame[list(FEATURE_COLUMNS)], preserve_index=False).cast(_schema())
+        self.manifest['parts'].append(self._write_part(table))
+        self._table = None
+
+    def _compact(self):
+        table = self.table()
+        old_parts = self.manifest['parts']
+        self.manifest['parts'] = [self._write_part(table)]
+        self._save_manifest()
+        for name in old_parts:
+            os.remove(os.path.join(self.path, name))
+        self._table = table
+
+    def _save_manifest(self):
+        os.makedirs(self.path, exist_ok=True)
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    def table(self):
+        """All cached rows as one Arrow table backed by memory-mapped part files."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._table is None:
+            parts = [pq.read_table(os.path.join(self.path, name), memory_map=True)
+                     for name in self.manifest['parts']]
+            self._table = _latest_by_id(pa.concat_tables(parts) if parts else _schema().empty_table())
+        return self._table
+
+    def variant(self, is_manual, is_v10):
+        """One variant's rows as an Arrow table."""
+        import pyarrow.compute as pc
+        table = self.table()
+        mask = pc.and_(pc.equal(table['is_manual'], is_manual), pc.equal(table['is_v10'], is_v10))
+        return table.filter(pc.fill_null(mask, False))
@@ -1,63 +1,346 @@
+import base64
+import gzip
+import hashlib
 import json
-import boto3
-import pandas as pd
-from sqlalchemy import create_engine
+import os
+import time
 from datetime import datetime, timedelta
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from feature_cache import FeatureCache
 
-def get_db_connection():
-    # Get RDS credentials from AWS Secrets Manager
+SECRET_ID = os.environ.get('DB_SECRET_ID', 'r8-db-credentials')
+# Credentials are refetched after this long, so a rotated secret is picked up without a cold start
+SECRET_TTL_SECONDS = float(os.environ.get('DB_SECRET_TTL_SECONDS', '300'))
+
+# Trained models are persisted here, keyed by variant and data version
+MODEL_DIR = os.environ.get('MODEL_DIR', '/tmp/r8-models')
+MODEL_SEED = 42
+# Fewer sales than this leave too few held-out rows to score a model on
+MIN_TRAINING_SALES = 10
+# Local Parquet copy of the feature columns, delta-synced on each request
+FEATURE_CACHE_DIR = os.environ.get('FEATURE_CACHE_DIR', '/tmp/r8-features')
+
+# Features are days since this date and mileage
+FEATURE_EPOCH = '2008-01-01'
+DEFAULT_MILEAGE = 10000
+DEFAULT_HORIZON_DAYS = 180
+# Upper bounds on one batch request: mileages x horizons per variant, and variants
+MAX_BATCH_POINTS = 50000
+MAX_BATCH_VARIANTS = 4
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+# Module state survives between warm invocations of the same container
+_secret_provider = None
+_credentials = None
+_credentials_expire = 0.0
+_engine = None
+_engine_url = None
+_models = {}
+_feature_cache = None
+
+def _fetch_secret(secret_id):
+    # boto3 is only needed on a secret refresh, so keep it off the cold start path
+    import boto3
     secrets = boto3.client('secretsmanager')
-    db_secret = secrets.get_secret_value(SecretId='r8-db-credentials')
-    credentials = json.loads(db_secret['SecretString'])
-    
-    connection_string = f"postgresql://{credentials['username']}:{credentials['password']}@{credentials['host']}/{credentials['dbname']}"
-    return create_engine(connection_string)
+    db_secret = secrets.get_secret_value(SecretId=secret_id)
+    return json.loads(db_secret['SecretString'])
+
+def set_secret_provider(provider):
+    """
+    Replace Secrets Manager with provider(secret_id) -> credentials dict,
+    e.g. a stub returning {'url': 'sqlite:///sales.db'} for local runs.
+    Pass None to restore Secrets Manager. Cached state is dropped.
+    """
+    global _secret_provider
+    _secret_provider = provider
+    invalidate_connection()
+
+def get_credentials(force_refresh=False):
+    global _credentials, _credentials_expire
+    now = time.monotonic()
+    if force_refresh or _credentials is None or now >= _credentials_expire:
+        _credentials = (_secret_provider or _fetch_secret)(SECRET_ID)
+        _credentials_expire = now + SECRET_TTL_SECONDS
+    return _credentials
+
+def connection_url(credentials):
+    # A 'url' entry lets stand-in databases (SQLite, local Postgres) skip the RDS fields
+    if 'url' in credentials:
+        return credentials['url']
+    port = f":{credentials['port']}" if credentials.get('port') else ''
+    return (f"postgresql://{credentials['username']}:{credentials['password']}"
+            f"@{credentials['host']}{port}/{credentials['dbname']}")
+
+def get_db_connection():
+    """Pooled engine reused across warm invocations, rebuilt only when the credentials change."""
+    global _engine, _engine_url
+    url = connection_url(get_credentials())
+    if _engine is None or url != _engine_url:
+        if _engine is not None:
+            _engine.dispose()
+        options = {} if url.startswith('sqlite') else {
+            # One container serves one request at a time; pre-ping drops connections RDS closed while idle
+            'pool_size': 1, 'max_overflow': 0, 'pool_pre_ping': True, 'pool_recycle': 900
+        }
+        _engine = create_engine(url, **options)
+        _engine_url = url
+    return _engine
+
+def invalidate_connection():
+    """Forget the cached credentials and close the pooled connections."""
+    global _credentials, _credentials_expire, _engine, _engine_url
+    if _engine is not None:
+        _engine.dispose()
+    _credentials = None
+    _credentials_expire = 0.0
+    _engine = None
+    _engine_url = None
+
+def _is_auth_error(error):
+    # 28P01 invalid_password, 28000 invalid_authorization_specification
+    code = getattr(error.orig, 'pgcode', None)
+    return code in ('28P01', '28000') or 'authentication failed' in str(error.orig).lower()
+
+def read_sql(query, params=None, **kwargs):
+    """
+    pandas.read_sql against the cached engine. If the database rejects the
+    cached credentials (e.g. after rotation), refetch them and retry once.
+    """
+    import pandas as pd
+    try:
+        return pd.read_sql(text(query), get_db_connection(), params=params, **kwargs)
+    except OperationalError as error:
+        if not _is_auth_error(error):
+            raise
+        invalidate_connection()
+        return pd.read_sql(text(query), get_db_connection(), params=params, **kwargs)
+
+def sync_features():
+    """The feature cache, with any sales created since the last request appended."""
+    global _feature_cache
+    if _feature_cache is None:
+        _feature_cache = FeatureCache(FEATURE_CACHE_DIR, read_sql)
+    _feature_cache.sync()
+    return _feature_cache
+
+def data_version(features):
+    """Row count and newest created_at of a variant's cached sales; changes whenever sales are added or updated."""
+    import pyarrow.compute as pc
+    return f"{features.num_rows}-{pc.max(features['created_at']).as_py()}"
+
+class InsufficientSalesError(ValueError):
+    """A variant has too few cached sales to train a model on."""
+
+def _variant_name(is_manual, is_v10):
+    # Built from the flags, never the raw query string, since it becomes a file name
+    return f"{'manual' if is_manual else 'auto'}-{'v10' if is_v10 else 'v8'}"
+
+def _model_path(variant, version):
+    digest = hashlib.sha1(version.encode()).hexdigest()[:16]
+    return os.path.join(MODEL_DIR, f"{variant}-{digest}.joblib")
+
+def train_model(features):
+    """Fit the price model on one variant's cached features; returns (model, held-out R^2)."""
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import RandomForestRegressor
+
+    df = features.select(['sale_price', 'sale_date', 'mileage']).to_pandas()
 
-def predict_price(event, context):
-    # Extract parameters
-    params = event.get('queryStringParameters', {})
-    transmission = params.get('transmission', 'manual')
-    engine = params.get('engine', 'v10')
-    
-    # Connect to database
-    engine = get_db_connection()
-    
-    # Get historical data
-    query = """
-    SELECT sale_price, sale_date, is_manual, is_v10, mileage
-    FROM r8_sales
-    WHERE is_manual = :is_manual AND is_v10 = :is_v10
-    """
-    
-    df = pd.read_sql(query, engine, params={
-        'is_manual': transmission == 'manual',
-        'is_v10': engine == 'v10'
-    })
-    
     # Prepare data for prediction
     df['days_since_epoch'] = (df['sale_date'] - datetime(2008, 1, 1)).dt.days
-    
+
     X = df[['days_since_epoch', 'mileage']]
     y = df['sale_price']
-    
-    # Train model
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
-    model = RandomForestRegressor(n_estimators=100)
+
+    # Train model; fixed seeds make the same data give the same model and accuracy
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=MODEL_SEED)
+    model = RandomForestRegressor(n_estimators=100, random_state=MODEL_SEED, n_jobs=-1)
     model.fit(X_train, y_train)
-    
-    # Make prediction for next 6 months
-    future_dates = pd.date_range(start=datetime.now(), periods=180, freq='D')
-    future_days = [(date - datetime(2008, 1, 1)).days for date in future_dates]
-    
-    predictions = model.predict([[days, 10000] for days in future_days])  # Assume 10k miles
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps({
-            'predictions': predictions.tolist(),
-            'dates': [d.strftime('%Y-%m-%d') for d in future_dates],
-            'accuracy': model.score(X_test, y_test)
+    return model, model.score(X_test, y_test)
+
+def get_model(transmission, engine_type, cache):
+    """
+    Model and accuracy for a variant, retrained only when its data version
+    changes. Warm invocations hit the in-memory cache; a new container
+    loads the artifact MODEL_DIR holds for the current version, if any.
+    Raises InsufficientSalesError if the variant has too few sales.
+    """
+    import joblib
+    is_manual, is_v10 = transmission == 'manual', engine_type == 'v10'
+    variant = _variant_name(is_manual, is_v10)
+    features = cache.variant(is_manual, is_v10)
+    if features.num_rows < MIN_TRAINING_SALES:
+        raise InsufficientSalesError(f"{variant} has {features.num_rows} sales; at least {MIN_TRAINING_SALES} are needed")
+    version = data_version(features)
+    cached = _models.get(variant)
+    if cached and cached[0] == version:
+        return cached[1], cached[2]
+
+    path = _model_path(variant, version)
+    if os.path.exists(path):
+        model, accuracy = joblib.load(path)
+    else:
+        model, accuracy = train_model(features)
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump((model, accuracy), tmp_path)
+        os.replace(tmp_path, path)
+        # Older versions of this variant will never be asked for again
+        prefix = f"{variant}-"
+        for name in os.listdir(MODEL_DIR):
+            if name.startswith(prefix) and name.endswith('.joblib') and os.path.join(MODEL_DIR, name) != path:
+                os.remove(os.path.join(MODEL_DIR, name))
+    _models[variant] = (version, model, accuracy)
+    return model, accuracy
+
+def forecast_features(horizons, mileages):
+    """
+    Forecast dates and the feature frame for every (mileage, horizon) pair,
+    mileage-major, built with array arithmetic rather than per-row loops.
+    """
+    import numpy as np
+    import pandas as pd
+    horizons = np.asarray(horizons, dtype=np.int64)
+    mileages = np.asarray(mileages, dtype=np.float64)
+    dates = np.datetime64('today', 'D') + horizons
+    days = (dates - np.datetime64(FEATURE_EPOCH, 'D')).astype(np.int64)
+    features = pd.DataFrame({
+        'days_since_epoch': np.tile(days, len(mileages)),
+        'mileage': np.repeat(mileages, len(days))
+    })
+    return dates, features
+
+def _response(event, payload, status=200):
+    """JSON response, gzip-compressed when the client sends Accept-Encoding: gzip."""
+    body = json.dumps(payload, separators=(',', ':'))
+    headers = {'Content-Type': 'application/json'}
+    request_headers = {k.lower(): v for k, v in ((event or {}).get('headers') or {}).items()}
+    if 'gzip' in request_headers.get('accept-encoding', '') and len(body) >= GZIP_MIN_BYTES:
+        headers['Content-Encoding'] = 'gzip'
+        return {
+            'statusCode': status,
+            'headers': headers,
+            'isBase64Encoded': True,
+            'body': base64.b64encode(gzip.compress(body.encode())).decode()
+        }
+    return {'statusCode': status, 'headers': headers, 'body': body}
+
+def _int_list(value, default):
+    if value is None:
+        return default
+    if isinstance(value, str):
+        value = [part for part in value.split(',') if part.strip()]
+    return [int(item) for item in value]
+
+def _variant(variant):
+    """{'transmission', 'engine'} from "manual-v10" or a dict of the two."""
+    if isinstance(variant, str):
+        variant = dict(zip(('transmission', 'engine'), variant.strip().split('-')))
+    if not isinstance(variant, dict):
+        raise ValueError(f"Unknown variant {variant!r}; expected \"manual-v10\" or {{\"transmission\": ..., \"engine\": ...}}")
+    if variant.get('transmission') not in ('manual', 'auto') or variant.get('engine') not in ('v10', 'v8'):
+        raise ValueError(f"Unknown variant {variant}; expected transmission manual|auto and engine v10|v8")
+    return variant
+
+def _batch_request(event):
+    """Variants, mileages and horizons from a JSON body or comma-separated query parameters."""
+    request = dict(event.get('queryStringParameters') or {})
+    if event.get('body'):
+        body = event['body']
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body)
+        request.update(json.loads(body))
+
+    variants = request.get('variants', 'manual-v10,auto-v10,manual-v8,auto-v8')
+    if isinstance(variants, str):
+        variants = variants.split(',')
+    if not isinstance(variants, list):
+        raise ValueError("variants must be a comma-separated string or a list")
+    if len(variants) > MAX_BATCH_VARIANTS:
+        raise ValueError(f"At most {MAX_BATCH_VARIANTS} variants per batch request")
+    variants = [_variant(variant) for variant in variants]
+
+    mileages = _int_list(request.get('mileages'), [DEFAULT_MILEAGE])
+    horizons = request.get('horizons')
+    if horizons is None:
+        days = int(request.get('days', DEFAULT_HORIZON_DAYS))
+        # Checked before the range is built, so a huge value cannot exhaust memory
+        if not 0 < days <= MAX_BATCH_POINTS:
+            raise ValueError(f"days must be between 1 and {MAX_BATCH_POINTS}")
+        horizons = list(range(days))
+    horizons = _int_list(horizons, [])
+    if not mileages or not horizons:
+        raise ValueError("At least one mileage and one horizon are required")
+    if not all(0 <= horizon < MAX_BATCH_POINTS for horizon in horizons):
+        raise ValueError(f"horizons must be day offsets from 0 to {MAX_BATCH_POINTS - 1}")
+    if len(mileages) * len(horizons) > MAX_BATCH_POINTS:
+        raise ValueError(f"At most {MAX_BATCH_POINTS} mileage x horizon points per variant")
+    return variants, mileages, horizons
+
+def predict_batch(event, context):
+    """
+    Forecasts for several variants, mileages and horizons in one call.
+
+    Request (JSON body or query string): up to MAX_BATCH_VARIANTS variants
+    ("manual-v10,auto-v8", or a list of such names or of
+    {"transmission": ..., "engine": ...}), mileages, and either horizons
+    (day offsets from today) or days (0..days-1, default 180). The response
+    is columnar: shared dates and mileages, then per variant a
+    predictions[mileage][date] matrix in whole dollars, or an error for a
+    variant with too few sales to forecast.
+    """
+    import numpy as np
+    try:
+        variants, mileages, horizons = _batch_request(event)
+    except (ValueError, TypeError) as error:
+        return _response(event, {'error': str(error)}, status=400)
+
+    cache = sync_features()
+    dates, features = forecast_features(horizons, mileages)
+    forecasts = []
+    for variant in variants:
+        try:
+            model, accuracy = get_model(variant['transmission'], variant['engine'], cache)
+        except InsufficientSalesError as error:
+            # One sparse variant should not cost the caller the others
+            forecasts.append({'transmission': variant['transmission'], 'engine': variant['engine'], 'error': str(error)})
+            continue
+        predictions = np.rint(model.predict(features)).astype(np.int64).reshape(len(mileages), len(horizons))
+        forecasts.append({
+            'transmission': variant['transmission'],
+            'engine': variant['engine'],
+            'accuracy': accuracy,
+            'predictions': predictions.tolist()
         })
-    }
\ No newline at end of file
+
+    return _response(event, {
+        'dates': np.datetime_as_string(dates).tolist(),
+        'mileages': mileages,
+        'forecasts': forecasts
+    })
+
+def predict_price(event, context):
+    # Heavy imports happen on the first request rather than at module load
+    import numpy as np
+
+    # Extract parameters
+    params = event.get('queryStringParameters') or {}
+    transmission = params.get('transmission', 'manual')
+    engine_type = params.get('engine', 'v10')
+
+    try:
+        model, accuracy = get_model(transmission, engine_type, sync_features())
+    except InsufficientSalesError as error:
+        return _response(event, {'error': str(error)}, status=422)
+
+    # Make prediction for next 6 months
+    future_dates, features = forecast_features(range(DEFAULT_HORIZON_DAYS), [DEFAULT_MILEAGE])
+    predictions = model.predict(features)  # Assume 10k miles
+
+    return _response(event, {
+        'predictions': predictions.tolist(),
+        'dates': np.datetime_as_string(future_dates).tolist(),
+        'accuracy': accuracy
+    })
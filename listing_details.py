@@ -0,0 +1,152 @@
+"""
+Functions for enriching sales with specs from their auction detail pages
+"""
+import asyncio
+import html
+import re
+from typing import Dict, Optional
+import aiohttp
+from config import DETAIL_CACHE_DIR, DETAIL_CACHE_MAX_AGE, DETAIL_MAX_CONCURRENCY, HTTP_TIMEOUT
+from http_cache import HttpCache
+from http_scraper import HEADERS
+from page_parser import normalize_text
+from run_metrics import RunMetrics
+
+LISTING_DETAILS_PATTERN = re.compile(r"Listing Details.*?<ul[^>]*>(.*?)</ul>", re.S | re.I)
+ITEM_PATTERN = re.compile(r"<li[^>]*>(.*?)</li>", re.S | re.I)
+TITLE_PATTERN = re.compile(r"<h1[^>]*>(.*?)</h1>", re.S | re.I)
+_TAGS = re.compile(r"<[^>]+>")
+
+# "31k Miles", "12,345 Miles", "~9,800 Miles Shown"; kilometres only when no miles are given
+MILES_PATTERN = re.compile(r"(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(k)?\s*Miles\b", re.I)
+KILOMETERS_PATTERN = re.compile(r"(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(k)?\s*(?:Kilometers|km)\b", re.I)
+TITLE_MILEAGE_PATTERN = re.compile(r"(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)(k)?-Mile\b", re.I)
+ENGINE_PATTERN = re.compile(r"\d\.\d-Liter\s+V\d+", re.I)
+TRANSMISSION_PATTERN = re.compile(r"Transaxle|Transmission|Gearbox|R tronic", re.I)
+KM_TO_MILES = 0.621371
+
+def _text(fragment):
+    return normalize_text(html.unescape(_TAGS.sub(" ", fragment)))
+
+def _distance(match):
+    value = float(match.group(1).replace(",", ""))
+    return value * 1000 if match.group(2) else value
+
+def parse_mileage(text) -> Optional[int]:
+    """Miles from one listing-details line, converting kilometres if only they are given."""
+    match = MILES_PATTERN.search(text)
+    if match:
+        return round(_distance(match))
+    match = KILOMETERS_PATTERN.search(text)
+    return round(_distance(match) * KM_TO_MILES) if match else None
+
+def parse_detail_specs(page_html) -> Dict[str, Optional[object]]:
+    """
+    Mileage, chassis number, engine, transmission and paint from an auction
+    page's "Listing Details" list, each None if absent. Mileage falls back
+    to a "13k-Mile" prefix in the title.
+    """
+    specs = {"mileage": None, "chassis": None, "engine": None, "transmission": None, "exterior_color": None}
+    block = LISTING_DETAILS_PATTERN.search(page_html)
+    items = [_text(item) for item in ITEM_PATTERN.findall(block.group(1))] if block else []
+    for item in items:
+        if specs["mileage"] is None and re.search(r"\b(?:Miles|Kilometers|km)\b", item, re.I):
+            specs["mileage"] = parse_mileage(item)
+        elif item.lower().startswith("chassis:"):
+            specs["chassis"] = item.split(":", 1)[1].strip() or None
+        elif specs["engine"] is None and ENGINE_PATTERN.search(item):
+            specs["engine"] = ENGINE_PATTERN.search(item).group(0)
+        elif specs["transmission"] is None and TRANSMISSION_PATTERN.search(item):
+            specs["transmission"] = item
+        elif specs["exterior_color"] is None and item.endswith(" Paint"):
+            specs["exterior_color"] = item[:-len(" Paint")]
+
+    if specs["mileage"] is None:
+        title = TITLE_PATTERN.search(page_html)
+        match = TITLE_MILEAGE_PATTERN.search(_text(title.group(1))) if title else None
+        if match:
+            specs["mileage"] = round(_distance(match))
+    return specs
+
+class DetailEnricher:
+    """
+    Fetches auction detail pages through an HttpCache, at most `concurrency`
+    at a time over one pooled aiohttp session.
+
+    A cached page younger than max_age is used without a request; an older
+    one is revalidated with If-None-Match / If-Modified-Since, so unchanged
+    pages come back as an empty 304. A page that cannot be fetched is
+    skipped (or served stale from the cache) and tried again on the next run.
+    """
+
+    def __init__(self, cache, concurrency=DETAIL_MAX_CONCURRENCY, max_age=DETAIL_CACHE_MAX_AGE,
+                 timeout=HTTP_TIMEOUT, metrics=None):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.max_age = max_age
+        self.timeout = timeout
+        self.metrics = metrics or RunMetrics()
+
+    async def _fetch(self, session, slots, url) -> Optional[bytes]:
+        entry = self.cache.get(url)
+        if entry and self.cache.is_fresh(entry, self.max_age):
+            self.metrics.count("detail.cached")
+            return self.cache.body(entry)
+
+        headers = self.cache.conditional_headers(entry) if entry else {}
+        async with slots:
+            with self.metrics.span("fetch_detail"):
+                try:
+                    async with session.get(url, headers=headers) as response:
+                        if response.status == 304 and entry:
+                            self.cache.touch(url)
+                            self.metrics.count("detail.not_modified")
+                            return self.cache.body(entry)
+                        if response.status == 200:
+                            body = await response.read()
+                            self.cache.store(url, body, response.headers)
+                            self.metrics.count("detail.downloaded")
+                            return body
+                        error = f"HTTP {response.status}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = f"{type(e).__name__}: {e}"
+        self.metrics.count("detail.errors")
+        print(f"Could not fetch {url} ({error})")
+        return self.cache.body(entry) if entry else None
+
+    async def specs(self, urls) -> Dict[str, Dict]:
+        """Parsed specs for every URL whose page could be read."""
+        slots = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+            urls = list(dict.fromkeys(urls))
+            bodies = await asyncio.gather(*(self._fetch(session, slots, url) for url in urls))
+        return {url: parse_detail_specs(body.decode("utf-8", errors="replace"))
+                for url, body in zip(urls, bodies) if body is not None}
+
+def enrich_sales(sales, cache_dir=DETAIL_CACHE_DIR, metrics=None, **enricher_options):
+    """
+    Fill in 'mileage' on parsed sale rows from their detail pages.
+
+    sales is a list of (row, url) pairs; rows without a URL are left alone.
+    Returns the number of rows given a mileage. The cache index is saved
+    even if the run is interrupted part way.
+    """
+    metrics = metrics or RunMetrics()
+    cache = HttpCache(cache_dir)
+    enricher = DetailEnricher(cache, metrics=metrics, **enricher_options)
+    try:
+        with metrics.span("enrich") as span:
+            specs = asyncio.run(enricher.specs(url for _, url in sales if url))
+            span["items"] = len(specs)
+    finally:
+        cache.save()
+
+    enriched = 0
+    for row, url in sales:
+        mileage = specs.get(url, {}).get("mileage")
+        if mileage is not None:
+            row["mileage"] = mileage
+            enriched += 1
+    return enriched
@@ -0,0 +1,63 @@
+"""
+Persisted index of listings that have already been scraped
+"""
+import json
+import os
+from typing import Iterable, Optional, Tuple
+from listing_parser import parse_sale_date
+
+
+def sale_date_from_details(details: str) -> Optional[str]:
+    """Return the sale date in the details text as YYYY-MM-DD, if any."""
+    date = parse_sale_date(details)
+    return date.strftime("%Y-%m-%d") if date else None
+
+
+class ListingIndex:
+    """
+    Set of (name, sale date) keys backed by a JSON file.
+
+    Both sold and "bid to" cards are recorded, so a page made up only of
+    unsold auctions is still recognised as known on the next crawl.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.keys = {tuple(key) for key in json.load(f)}
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, name: str, date: str):
+        self.keys.add((name, date))
+
+    def add_cards(self, pairs: Iterable[Tuple[str, str]]):
+        for name, details in pairs:
+            date = sale_date_from_details(details)
+            if date:
+                self.add(name, date)
+
+    def page_is_known(self, pairs: Iterable[Tuple[str, str]]) -> bool:
+        """True if every dated card on the page is already in the index."""
+        dated = 0
+        for name, details in pairs:
+            date = sale_date_from_details(details)
+            if date is None:
+                continue
+            dated += 1
+            if (name, date) not in self.keys:
+                return False
+        return dated > 0
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sorted(self.keys), f)
+        os.replace(tmp_path, self.path)
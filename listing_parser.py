@@ -0,0 +1,146 @@
+"""
+Shared parsing of listing names and result details
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+FIRST_GEN_YEARS = (2008, 2015)
+
+YEAR_PATTERN = re.compile(r'\b(20\d{2})\b')
+# Price and sale date are found in one scan of the details text
+DETAILS_PATTERN = re.compile(r"\$(?P<price>[0-9,]+)|on (?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{2})")
+PRICE_PATTERN = re.compile(r"\$([0-9,]+)")
+SALE_DATE_PATTERN = re.compile(r"on (\d{1,2})/(\d{1,2})/(\d{2})")
+
+@lru_cache(maxsize=8192)
+def _sale_date(month, day, year):
+    # Same century pivot as strptime's %y; invalid dates raise ValueError
+    year = int(year)
+    return datetime(year + (2000 if year < 69 else 1900), int(month), int(day))
+
+def extract_year(name: str) -> Optional[int]:
+    """Extract the year (20XX) from the listing name."""
+    match = YEAR_PATTERN.search(name)
+    return int(match.group(1)) if match else None
+
+def parse_price(details: str) -> Optional[float]:
+    """Return the first dollar amount in the details text."""
+    match = PRICE_PATTERN.search(details)
+    if not match:
+        return None
+    digits = match.group(1).replace(',', '')
+    return float(digits) if digits else None
+
+def parse_sale_date(details: str) -> Optional[datetime]:
+    """Return the first sale date in the details text."""
+    match = SALE_DATE_PATTERN.search(details)
+    if not match:
+        return None
+    try:
+        return _sale_date(*match.groups())
+    except ValueError:
+        return None
+
+def parse_details(details: str):
+    """
+    Return (price, sale date) from the first dollar amount and the first
+    sale date in the details text, each None if missing or malformed.
+    """
+    price = date = None
+    price_seen = date_seen = False
+    for match in DETAILS_PATTERN.finditer(details):
+        if match.lastgroup == 'price':
+            if not price_seen:
+                price_seen = True
+                digits = match.group('price').replace(',', '')
+                price = float(digits) if digits else None
+        elif not date_seen:
+            date_seen = True
+            try:
+                date = _sale_date(match.group('month'), match.group('day'), match.group('year'))
+            except ValueError:
+                pass
+        if price_seen and date_seen:
+            break
+    return price, date
+
+def parse_listing(name: str, details: str) -> Optional[dict]:
+    """Return a dict with listing data if valid first-gen R8, else None."""
+    year = extract_year(name)
+    if not year or year < FIRST_GEN_YEARS[0] or year > FIRST_GEN_YEARS[1]:
+        return None
+
+    price, date = parse_details(details)
+    if price is None or date is None:
+        return None
+
+    return {
+        'name': name,
+        'year': year,
+        'price': price,
+        'date': date,
+        'is_manual': '6-Speed' in name,
+        'is_v10': 'V10' in name
+    }
+
+def parse_listing_batch(names, details, drop_bids=True):
+    """
+    Parse whole columns of names and details at once.
+
+    The regexes run as vectorized Arrow compute kernels and each distinct
+    sale date string is parsed only once. Returns a pandas DataFrame with
+    the same columns and values as parse_listing, one row per valid
+    first-gen listing in input order. With drop_bids, "bid to" results are
+    skipped as the scrapers do.
+    """
+    # Only batch parsing needs these, so keep them off the import path
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    names = pa.array(names, type=pa.string())
+    details = pa.array(details, type=pa.string())
+
+    # Arrow's RE2 kernels return the leftmost match, as re.search does
+    year = pc.cast(pc.struct_field(pc.extract_regex(names, r"\b(?P<m>20\d{2})\b"), [0]), pa.int64())
+    price_digits = pc.replace_substring(
+        pc.struct_field(pc.extract_regex(details, r"\$(?P<m>[0-9,]+)"), [0]), ",", ""
+    )
+    price_digits = pc.if_else(pc.equal(price_digits, ""), pa.scalar(None, pa.string()), price_digits)
+    price = pc.cast(price_digits, pa.float64())
+
+    # Sales share a few thousand distinct dates, so parse each distinct one once
+    date_text = pc.struct_field(
+        pc.extract_regex(details, r"on (?P<m>\d{1,2}/\d{1,2}/\d{2})"), [0]
+    ).dictionary_encode()
+    parsed = pd.to_datetime(
+        pd.Series(date_text.dictionary.to_pylist(), dtype=object), format="%m/%d/%y", errors="coerce"
+    ).to_numpy()
+    codes = date_text.indices.to_numpy(zero_copy_only=False)
+    valid_date = date_text.is_valid().to_numpy(zero_copy_only=False)
+    date = np.full(len(codes), np.datetime64("NaT"), dtype=parsed.dtype)
+    date[valid_date] = parsed[codes[valid_date].astype(np.int64)]
+
+    year_values = year.to_numpy(zero_copy_only=False)
+    price_values = price.to_numpy(zero_copy_only=False)
+    valid = (
+        pc.fill_null(pc.and_(pc.greater_equal(year, FIRST_GEN_YEARS[0]),
+                             pc.less_equal(year, FIRST_GEN_YEARS[1])), False).to_numpy(zero_copy_only=False)
+        & price.is_valid().to_numpy(zero_copy_only=False)
+        & ~np.isnat(date)
+    )
+    if drop_bids:
+        valid &= ~pc.match_substring(details, "bid to", ignore_case=True).to_numpy(zero_copy_only=False)
+
+    valid_names = names.filter(pa.array(valid))
+    return pd.DataFrame({
+        'name': np.array(valid_names.to_pylist(), dtype=object),
+        'year': year_values[valid].astype(np.int64),
+        'price': price_values[valid].astype(np.float64),
+        'date': date[valid],
+        'is_manual': pc.match_substring(valid_names, "6-Speed").to_numpy(zero_copy_only=False),
+        'is_v10': pc.match_substring(valid_names, "V10").to_numpy(zero_copy_only=False)
+    })
@@ -0,0 +1,253 @@
+"""
+Columnar storage for parsed listings
+"""
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from price_stats import PriceStats
+
+@dataclass
+class ListingData:
+    name: str
+    details: str
+    price: float
+
+# Bits of the packed flags column
+MANUAL = 1
+V10 = 2
+
+# Buffered dates are kept as days since 1970-01-01, which is how
+# datetime64[D] stores them
+EPOCH_ORDINAL = 719163
+NAT_DAYS = np.iinfo(np.int64).min
+
+class ListingStore:
+    """
+    Append-only listing table backed by NumPy arrays.
+
+    price, date and year are typed columns and the manual/V10 booleans are
+    packed into one uint8 bitmask per row. Names and details stay as Python
+    strings since they are only needed when listings are displayed.
+    Single-row appends are buffered and copied into the arrays in bulk the
+    next time a column is read, and the arrays grow geometrically, so
+    appends are amortised O(1).
+
+    Running PriceStats are kept for each of the four flag combinations and
+    updated as rows are written, so category aggregates never rescan the
+    price column.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._price = np.empty(capacity, dtype=np.float64)
+        self._date = np.empty(capacity, dtype='datetime64[D]')
+        self._year = np.empty(capacity, dtype=np.int16)
+        self._flags = np.empty(capacity, dtype=np.uint8)
+        self._pending = []
+        self._stats = [PriceStats() for _ in range((MANUAL | V10) + 1)]
+        self.names = []
+        self.details = []
+
+    def __len__(self) -> int:
+        return self._size + len(self._pending)
+
+    @property
+    def prices(self) -> np.ndarray:
+        self._flush()
+        return self._price[:self._size]
+
+    @property
+    def dates(self) -> np.ndarray:
+        self._flush()
+        return self._date[:self._size]
+
+    @property
+    def years(self) -> np.ndarray:
+        self._flush()
+        return self._year[:self._size]
+
+    @property
+    def flags(self) -> np.ndarray:
+        self._flush()
+        return self._flags[:self._size]
+
+    @property
+    def is_manual(self) -> np.ndarray:
+        return (self.flags & MANUAL).astype(bool)
+
+    @property
+    def is_v10(self) -> np.ndarray:
+        return (self.flags & V10).astype(bool)
+
+    def append(self, name: str, details: str, price: float, date=None,
+               year: Optional[int] = None, is_manual: bool = False, is_v10: bool = False):
+        """Add one listing; a missing date is stored as NaT and a missing year as 0."""
+        flags = (MANUAL if is_manual else 0) | (V10 if is_v10 else 0)
+        days = date.toordinal() - EPOCH_ORDINAL if date is not None else NAT_DAYS
+        self._pending.append((price, days, year or 0, flags))
+        self.names.append(name)
+        self.details.append(details)
+
+    def extend(self, names, details, prices, dates, years, is_manual, is_v10):
+        """Add many listings from equal-length columns in one copy per column."""
+        self._flush()
+        flags = (np.asarray(is_manual, dtype=np.uint8) * MANUAL
+                 | np.asarray(is_v10, dtype=np.uint8) * V10)
+        self._write(prices, dates, years, flags)
+        self._update_stats(prices, flags)
+        self.names.extend(names)
+        self.details.extend(details)
+
+    def merge(self, other: 'ListingStore'):
+        """Append every row of another store, merging its stats rather than recomputing them."""
+        self._flush()
+        self._write(other.prices, other.dates, other.years, other.flags)
+        for stats, other_stats in zip(self._stats, other._stats):
+            stats.merge(other_stats)
+        self.names.extend(other.names)
+        self.details.extend(other.details)
+
+    def stats(self, bits: int = 0, want: int = 0) -> PriceStats:
+        """Combined PriceStats of the rows whose flags match want on the given bits."""
+        self._flush()
+        combined = PriceStats()
+        for value, stats in enumerate(self._stats):
+            if value & bits == want:
+                combined.merge(stats)
+        return combined
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        prices, days, years, flags = zip(*pending)
+        self._write(prices, np.array(days, dtype=np.int64).view('datetime64[D]'), years, flags)
+        self._update_stats(prices, flags)
+
+    def _update_stats(self, prices, flags):
+        prices = np.asarray(prices, dtype=np.float64)
+        flags = np.asarray(flags, dtype=np.uint8)
+        for value, stats in enumerate(self._stats):
+            stats.add_array(prices[flags == value])
+
+    def _write(self, prices, dates, years, flags):
+        count = len(prices)
+        self._reserve(count)
+        rows = slice(self._size, self._size + count)
+        self._price[rows] = prices
+        self._date[rows] = np.asarray(dates, dtype='datetime64[D]')
+        self._year[rows] = years
+        self._flags[rows] = flags
+        self._size += count
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        capacity = len(self._price)
+        if needed <= capacity:
+            return
+        capacity = max(capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_price', '_date', '_year', '_flags'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    @classmethod
+    def from_rows(cls, rows, details=None):
+        """Build a store from parse_listing-style dicts."""
+        rows = list(rows)
+        store = cls(max(len(rows), 1))
+        store.extend(
+            [row['name'] for row in rows],
+            details if details is not None else [''] * len(rows),
+            [row['price'] for row in rows],
+            [row['date'] for row in rows],
+            [row['year'] for row in rows],
+            [row['is_manual'] for row in rows],
+            [row['is_v10'] for row in rows]
+        )
+        return store
+
+    @classmethod
+    def from_frame(cls, frame, details=None):
+        """Build a store from a parse_listing_batch DataFrame."""
+        store = cls(max(len(frame), 1))
+        store.extend(
+            frame['name'].tolist(),
+            details if details is not None else [''] * len(frame),
+            frame['price'].to_numpy(),
+            frame['date'].to_numpy(),
+            frame['year'].to_numpy(),
+            frame['is_manual'].to_numpy(),
+            frame['is_v10'].to_numpy()
+        )
+        return store
+
+    def view(self, manual: Optional[bool] = None, v10: Optional[bool] = None) -> 'CategoryView':
+        return CategoryView(self, manual, v10)
+
+class CategoryView:
+    """
+    Live view of the listings in one category.
+
+    A view holds no copy of the columns: it is a bitmask test over the
+    store's flags column, recomputed only when the store has grown.
+    Counts and price aggregates come from the store's running stats, so
+    they do not touch the columns at all.
+    """
+
+    def __init__(self, store: ListingStore, manual: Optional[bool] = None, v10: Optional[bool] = None):
+        self.store = store
+        self._bits = (MANUAL if manual is not None else 0) | (V10 if v10 is not None else 0)
+        self._want = (MANUAL if manual else 0) | (V10 if v10 else 0)
+        self._mask = None
+        self._stats = None
+        self._stats_size = -1
+
+    @property
+    def mask(self) -> np.ndarray:
+        if self._mask is None or len(self._mask) != len(self.store):
+            self._mask = (self.store.flags & self._bits) == self._want
+        return self._mask
+
+    @property
+    def stats(self) -> PriceStats:
+        if self._stats_size != len(self.store):
+            self._stats = self.store.stats(self._bits, self._want)
+            self._stats_size = len(self.store)
+        return self._stats
+
+    def __len__(self) -> int:
+        return self.stats.count
+
+    def __iter__(self) -> Iterator[Tuple[ListingData, float]]:
+        store = self.store
+        prices = store.prices
+        for i in np.flatnonzero(self.mask):
+            price = float(prices[i])
+            yield ListingData(store.names[i], store.details[i], price), price
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self.store.prices[self.mask]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.store.dates[self.mask]
+
+    def mean(self) -> float:
+        return self.stats.mean
+
+    def min(self) -> float:
+        return self.stats.min
+
+    def max(self) -> float:
+        return self.stats.max
+
+    def median(self) -> float:
+        return self.stats.median
+
+    def quantile(self, q: float) -> float:
+        return self.stats.quantile(q)
@@ -0,0 +1,211 @@
+"""
+Virtualized, sortable and filterable table of listings for the Tk GUI
+"""
+import tkinter as tk
+from tkinter import ttk
+from typing import List, Optional, Tuple
+import numpy as np
+from listing_store import ListingStore
+
+# Category name -> (manual, v10) arguments for ListingStore.view
+CATEGORIES = {
+    'All Listings': (None, None),
+    'Manual Transmission': (True, None),
+    'Automatic Transmission': (False, None),
+    'V10 Manual': (True, True),
+    'V10 Automatic': (False, True),
+    'V8 Manual': (True, False),
+    'V8 Automatic': (False, False)
+}
+
+COLUMNS = ('name', 'year', 'price', 'date', 'details')
+HEADINGS = {'name': 'Listing', 'year': 'Year', 'price': 'Price', 'date': 'Sale Date', 'details': 'Details'}
+ROW_HEIGHT = 22
+
+def _details_text(details: str) -> str:
+    # Results text shown on one line, and sorted as shown
+    return " | ".join(details.splitlines())
+
+class ListingTableModel:
+    """
+    The rows a ListingsTable shows, as an array of store row numbers.
+
+    Filtering and sorting only rebuild that index array; row values are
+    formatted on demand for the window of rows currently on screen.
+    """
+
+    def __init__(self, store: Optional[ListingStore] = None):
+        self.store = store or ListingStore()
+        self.category = 'All Listings'
+        self.search = ''
+        self.sort_column = None
+        self.descending = False
+        self.rows = np.arange(0)
+        self._text_orders = {}
+        self.refresh()
+
+    def set_store(self, store: ListingStore):
+        self.store = store
+        self._text_orders = {}
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def refresh(self):
+        """Rebuild the visible rows from the category, search text and sort column."""
+        store = self.store
+        manual, v10 = CATEGORIES[self.category]
+        order = self._sort_order()
+        mask = store.view(manual, v10).mask
+        if self.search:
+            needle = self.search.lower()
+            mask = mask & np.fromiter((needle in name.lower() for name in store.names),
+                                      dtype=bool, count=len(store))
+        rows = order[mask[order]]
+        self.rows = rows[::-1] if self.descending else rows
+
+    def sort_by(self, column: str):
+        """Sort on column, reversing the order if it is already the sort column."""
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        self.refresh()
+
+    def _sort_order(self) -> np.ndarray:
+        store = self.store
+        if self.sort_column is None:
+            return np.arange(len(store))
+        if self.sort_column in ('name', 'details'):
+            # String sorts are the slow ones, so reuse each until the store grows
+            order = self._text_orders.get(self.sort_column)
+            if order is None or len(order) != len(store):
+                texts = store.names if self.sort_column == 'name' else [_details_text(d) for d in store.details]
+                order = self._text_orders[self.sort_column] = np.argsort(np.array(texts, dtype=object), kind='stable')
+            return order
+        column = {'year': store.years, 'price': store.prices, 'date': store.dates}[self.sort_column]
+        return np.argsort(column, kind='stable')
+
+    def window(self, start: int, count: int) -> List[Tuple]:
+        """Display values of count rows starting at position start."""
+        store = self.store
+        rows = self.rows[start:start + count]
+        prices, dates, years = store.prices[rows], store.dates[rows], store.years[rows]
+        return [
+            (
+                store.names[row],
+                int(year) or '',
+                f"${price:,.2f}",
+                str(date) if not np.isnat(date) else '',
+                _details_text(store.details[row])
+            )
+            for row, price, date, year in zip(rows.tolist(), prices, dates, years)
+        ]
+
+class ListingsTable(ttk.Frame):
+    """
+    Treeview showing a ListingTableModel through a fixed set of item rows.
+
+    Only as many Treeview items exist as fit on screen. Scrolling moves an
+    offset into the model and rewrites those items, so the widget costs
+    the same with a hundred listings or a hundred thousand.
+    """
+
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.model = ListingTableModel()
+        self.offset = 0
+        self.visible = 0
+
+        controls = ttk.Frame(self)
+        controls.pack(fill='x', pady=(0, 5))
+        ttk.Label(controls, text="Category:").pack(side='left', padx=5)
+        self.category = tk.StringVar(value=self.model.category)
+        category_box = ttk.Combobox(controls, textvariable=self.category, values=list(CATEGORIES),
+                                    state='readonly', width=25)
+        category_box.pack(side='left', padx=5)
+        category_box.bind('<<ComboboxSelected>>', lambda event: self._apply_filters())
+        ttk.Label(controls, text="Search:").pack(side='left', padx=5)
+        self.search = tk.StringVar()
+        self.search.trace_add('write', lambda *args: self._apply_filters())
+        ttk.Entry(controls, textvariable=self.search, width=30).pack(side='left', padx=5)
+        self.count_label = ttk.Label(controls, text="0 listings")
+        self.count_label.pack(side='right', padx=5)
+
+        ttk.Style().configure('Listings.Treeview', rowheight=ROW_HEIGHT)
+        body = ttk.Frame(self)
+        body.pack(expand=True, fill='both')
+        self.tree = ttk.Treeview(body, columns=COLUMNS, show='headings', style='Listings.Treeview',
+                                 selectmode='browse')
+        for column in COLUMNS:
+            self.tree.heading(column, text=HEADINGS[column], command=lambda c=column: self._sort(c))
+        self.tree.column('name', width=320)
+        self.tree.column('year', width=60, anchor='center')
+        self.tree.column('price', width=110, anchor='e')
+        self.tree.column('date', width=100, anchor='center')
+        self.tree.column('details', width=500)
+        self.scrollbar = ttk.Scrollbar(body, orient='vertical', command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', expand=True, fill='both')
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(1, 'units'))
+
+    def set_store(self, store: ListingStore):
+        self.model.set_store(store)
+        self.offset = 0
+        self._render()
+
+    def _apply_filters(self):
+        self.model.category = self.category.get()
+        self.model.search = self.search.get()
+        self.model.refresh()
+        self.offset = 0
+        self._render()
+
+    def _sort(self, column):
+        self.model.sort_by(column)
+        for name in COLUMNS:
+            arrow = (' ▼' if self.model.descending else ' ▲') if name == column else ''
+            self.tree.heading(name, text=HEADINGS[name] + arrow)
+        self.offset = 0
+        self._render()
+
+    def _on_resize(self, event):
+        # Rows that fit below the heading row
+        visible = max(1, event.height // ROW_HEIGHT - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.model))
+            self._render()
+        else:
+            self.scroll(int(amount), unit)
+
+    def scroll(self, amount: int, unit: str):
+        step = self.visible if unit == 'pages' else 1
+        self.offset += amount * step
+        self._render()
+
+    def _render(self):
+        total = len(self.model)
+        self.offset = max(0, min(self.offset, total - self.visible))
+        values = self.model.window(self.offset, self.visible)
+
+        items = self.tree.get_children()
+        for item, row in zip(items, values):
+            self.tree.item(item, values=row)
+        for row in values[len(items):]:
+            self.tree.insert('', 'end', values=row)
+        if len(items) > len(values):
+            self.tree.delete(*items[len(values):])
+
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(values)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+        self.count_label.config(text=f"{total:,} listings")
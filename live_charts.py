@@ -0,0 +1,367 @@
+"""
+Functions for drawing the graphs incrementally while a crawl is running
+"""
+import time
+import numpy as np
+from chart_data import VARIANTS, lttb
+from config import CHART_MAX_POINTS, LIVE_CHART_FPS
+from listing_store import MANUAL, V10
+
+HIST_BINS = 30
+VARIANT_COLORS = {'V10 Manual': 'darkred', 'V10 Auto': 'red', 'V8 Manual': 'darkblue', 'V8 Auto': 'blue'}
+VARIANT_MARKERS = {'V10 Manual': 'o', 'V10 Auto': '^', 'V8 Manual': 'o', 'V8 Auto': '^'}
+# Axis limits are widened by this fraction of the data range beyond it, so they change rarely
+LIMIT_HEADROOM = 0.1
+
+class SortedPrices:
+    """
+    Prices kept in sorted order as batches arrive, so box plot statistics,
+    the median and histogram counts are binary searches into the array
+    instead of a sort of every price seen so far.
+    """
+
+    def __init__(self):
+        self.values = np.empty(0)
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, prices):
+        batch = np.sort(np.asarray(prices, dtype=np.float64))
+        self.values = np.insert(self.values, np.searchsorted(self.values, batch), batch)
+        self.total += float(batch.sum())
+
+    def mean(self) -> float:
+        return self.total / len(self.values) if len(self.values) else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Linearly interpolated, as numpy.percentile."""
+        position = (len(self.values) - 1) * q
+        lower = int(position)
+        upper = min(lower + 1, len(self.values) - 1)
+        return float(self.values[lower] + (self.values[upper] - self.values[lower]) * (position - lower))
+
+    def box_stats(self, whis=1.5) -> dict:
+        """Quartiles, whiskers and fliers as matplotlib's boxplot computes them."""
+        values = self.values
+        q1, med, q3 = self.quantile(0.25), self.quantile(0.5), self.quantile(0.75)
+        iqr = q3 - q1
+        low = np.searchsorted(values, q1 - whis * iqr, 'left')
+        high = np.searchsorted(values, q3 + whis * iqr, 'right')
+        return {
+            'q1': q1, 'med': med, 'q3': q3,
+            'whislo': min(values[low], q1), 'whishi': max(values[high - 1], q3),
+            'fliers': np.concatenate((values[:low], values[high:]))
+        }
+
+    def histogram(self, bins):
+        """(counts, edges) of bins equal-width bins over the price range, as numpy.histogram."""
+        low, high = self.values[0], self.values[-1]
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        edges = np.linspace(low, high, bins + 1)
+        positions = np.searchsorted(self.values, edges, 'left')
+        positions[-1] = len(self.values)
+        return np.diff(positions), edges
+
+class LiveChartData:
+    """
+    Everything the graphs show, grown one parsed page of sales at a time.
+
+    Prices go into SortedPrices per variant, per transmission and overall.
+    New dated sales are appended to each variant's price trend as they
+    are; only when a trend grows past max_points is it rebuilt as an LTTB
+    downsample of everything so far to half that, so downsampling runs once
+    every max_points / 2 sales rather than on every frame.
+    """
+
+    def __init__(self, max_points=CHART_MAX_POINTS):
+        self.max_points = max_points
+        self.variant_prices = {variant: SortedPrices() for variant in VARIANTS}
+        self.manual_prices = SortedPrices()
+        self.auto_prices = SortedPrices()
+        self.all_prices = SortedPrices()
+        self._trend_parts = {variant: [] for variant in VARIANTS}
+        self._shown = {variant: (np.empty(0, 'datetime64[D]'), np.empty(0)) for variant in VARIANTS}
+
+    def __len__(self):
+        return len(self.all_prices)
+
+    def add(self, rows):
+        """Add sale rows as returned by listing_parser.parse_listing."""
+        if not rows:
+            return
+        prices = np.array([row['price'] for row in rows], dtype=np.float64)
+        dates = np.array([row.get('date') for row in rows], dtype='datetime64[D]')
+        flags = np.array([(MANUAL if row.get('is_manual') else 0) | (V10 if row.get('is_v10') else 0)
+                          for row in rows], dtype=np.uint8)
+        self.add_columns(prices, dates, flags)
+
+    def add_columns(self, prices, dates, flags):
+        for variant, value in VARIANTS.items():
+            rows = flags == value
+            if rows.any():
+                self.variant_prices[variant].add(prices[rows])
+                dated = rows & ~np.isnat(dates)
+                self._trend_parts[variant].append((dates[dated], prices[dated]))
+                shown_dates, shown_prices = self._shown[variant]
+                self._shown[variant] = (np.concatenate((shown_dates, dates[dated])),
+                                        np.concatenate((shown_prices, prices[dated])))
+        manual = (flags & MANUAL) != 0
+        self.manual_prices.add(prices[manual])
+        self.auto_prices.add(prices[~manual])
+        self.all_prices.add(prices)
+
+    def _downsample(self, variant, points):
+        parts = self._trend_parts[variant]
+        dates = np.concatenate([part[0] for part in parts]) if parts else np.empty(0, 'datetime64[D]')
+        prices = np.concatenate([part[1] for part in parts]) if parts else np.empty(0)
+        order = np.argsort(dates, kind='stable')
+        dates, prices = dates[order], prices[order]
+        self._trend_parts[variant] = [(dates, prices)]
+        keep = lttb(dates.astype(np.int64), prices, points)
+        return dates[keep], prices[keep]
+
+    def trend(self, variant, exact=False):
+        """
+        (dates, prices) of one variant to plot, at most max_points of them.
+        exact gives the same LTTB downsample of every sale as
+        chart_data.prepare_chart_data, for the last frame of a crawl.
+        """
+        if exact:
+            self._shown[variant] = self._downsample(variant, self.max_points)
+        elif len(self._shown[variant][0]) > self.max_points:
+            self._shown[variant] = self._downsample(variant, self.max_points // 2)
+        return self._shown[variant]
+
+def _fit_limits(current, low, high):
+    """New limits around [low, high] with headroom if it does not fit in current, else None."""
+    if current[0] <= low and high <= current[1]:
+        return None
+    margin = (high - low) * LIMIT_HEADROOM or abs(high) * LIMIT_HEADROOM or 1.0
+    return low - margin, high + margin
+
+class LiveCharts:
+    """
+    The four graphs of AudiAnalysisGUI.update_graphs, built once on figure
+    and then updated in place from a LiveChartData.
+
+    Every data artist is animated: a frame moves the scatter points with
+    set_offsets, the histogram, box plot and mean/median lines with
+    set_data and resizes the box rectangles, then blits them over a cached
+    background of axes, grids and labels. The background is only redrawn
+    when the data outgrows the axis limits, which are widened with headroom
+    so that happens a handful of times per crawl. update() asks for a frame
+    and frames run at most fps times a second, deferred with widget.after
+    when a Tk widget is given. With blit=False, or on a canvas that cannot
+    blit, every frame redraws the whole figure.
+    """
+
+    def __init__(self, figure, canvas, data, fps=LIVE_CHART_FPS, widget=None, blit=True):
+        from matplotlib.lines import Line2D
+        self.figure = figure
+        self.canvas = canvas
+        self.data = data
+        self.interval = 1.0 / fps
+        self.widget = widget
+        self.blit = blit and canvas.supports_blit
+        self.frames = 0
+        self.redraws = 0
+        self._last_frame = 0.0
+        self._pending = None
+        self._background = None
+        self._legend_pixels = None
+
+        figure.clear()
+        self.trend_ax = figure.add_subplot(221)
+        self.transmission_ax = figure.add_subplot(222)
+        self.engine_ax = figure.add_subplot(223)
+        self.dist_ax = figure.add_subplot(224)
+
+        self.scatters = {
+            variant: self.trend_ax.scatter([], [], label=variant, color=VARIANT_COLORS[variant],
+                                           marker=VARIANT_MARKERS[variant], alpha=0.6, animated=True)
+            for variant in VARIANTS
+        }
+        self.trend_ax.xaxis_date()
+        self.trend_ax.set_title('First-Gen R8 Price Trends by Variant')
+        self.trend_ax.set_xlabel('Sale Date')
+        self.trend_ax.set_ylabel('Price ($)')
+        # Drawn over the points: rendered once per background and pasted back each frame
+        self.trend_legend = self.trend_ax.legend(handles=[
+            Line2D([], [], linestyle='none', label=variant, color=VARIANT_COLORS[variant],
+                   marker=VARIANT_MARKERS[variant], alpha=0.6)
+            for variant in VARIANTS
+        ], loc='upper left')
+        self.trend_legend.set_animated(True)
+        self.trend_ax.tick_params(axis='x', rotation=45)
+        self.trend_ax.grid(True, linestyle='--', alpha=0.7)
+
+        self.transmission_boxes = self._boxes(self.transmission_ax, ['Manual', 'Auto'], ['lightblue', 'lightgreen'])
+        self.transmission_ax.set_title('Price Distribution by Transmission')
+        self.transmission_ax.set_ylabel('Price ($)')
+        self.engine_boxes = self._boxes(self.engine_ax, list(VARIANTS), [VARIANT_COLORS[v] for v in VARIANTS])
+        self.engine_ax.set_title('Price Distribution by Engine & Transmission')
+        self.engine_ax.set_ylabel('Price ($)')
+        self.engine_ax.tick_params(axis='x', rotation=45)
+
+        # Filled steps plus one polyline around every bar stand in for 30 bar rectangles
+        self.histogram = self.dist_ax.stairs(np.zeros(HIST_BINS), np.arange(HIST_BINS + 1), fill=True,
+                                             color='skyblue', animated=True)
+        self.histogram_edges = self.dist_ax.plot([], [], color='black', linewidth=1, animated=True)[0]
+        self.mean_line = self.dist_ax.axvline(0, color='red', linestyle='--', label='Mean', animated=True)
+        self.median_line = self.dist_ax.axvline(0, color='green', linestyle='--', label='Median', animated=True)
+        self.dist_ax.set_title('Price Distribution')
+        self.dist_ax.set_xlabel('Price ($)')
+        self.dist_ax.set_ylabel('Number of Sales')
+        self.dist_ax.grid(True, linestyle='--', alpha=0.7)
+        # The legend stays in the background; only the values beside it change per frame
+        self.dist_ax.legend(loc='upper right')
+        self.dist_values = self.dist_ax.text(0.02, 0.97, '', transform=self.dist_ax.transAxes,
+                                             va='top', parse_math=False, animated=True)
+        figure.tight_layout()
+
+        self._artists = (list(self.scatters.values()) + [self.histogram, self.histogram_edges]
+                         + [self.mean_line, self.median_line, self.dist_values])
+        for boxes in (self.transmission_boxes, self.engine_boxes):
+            self._artists += boxes['boxes'] + [boxes['medians'], boxes['whiskers'], boxes['fliers']]
+        self._draw_id = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _boxes(self, ax, labels, colors):
+        positions = np.arange(1, len(labels) + 1)
+        boxes = {
+            'positions': positions,
+            'boxes': list(ax.bar(positions, np.zeros(len(labels)), width=0.5, color=colors,
+                                 edgecolor='black', animated=True).patches),
+            'medians': ax.plot([], [], color='C1', animated=True)[0],
+            'whiskers': ax.plot([], [], color='black', linewidth=1, animated=True)[0],
+            'fliers': ax.plot([], [], linestyle='none', marker='o', markerfacecolor='none',
+                              markeredgecolor='black', animated=True)[0]
+        }
+        ax.set_xticks(positions, labels)
+        ax.set_xlim(0.5, len(labels) + 0.5)
+        ax.grid(True, linestyle='--', alpha=0.7)
+        return boxes
+
+    def _update_boxes(self, boxes, groups):
+        # Medians, whiskers and caps of every box are one Line2D each, segments split by NaN
+        medians, whiskers, fliers = [], [], []
+        for x, box, prices in zip(boxes['positions'], boxes['boxes'], groups):
+            box.set_visible(len(prices) > 0)
+            if not len(prices):
+                continue
+            stats = prices.box_stats()
+            box.set_y(stats['q1'])
+            box.set_height(stats['q3'] - stats['q1'])
+            medians += [(x - 0.25, stats['med']), (x + 0.25, stats['med']), (np.nan, np.nan)]
+            for end, edge in ((stats['whislo'], stats['q1']), (stats['whishi'], stats['q3'])):
+                whiskers += [(x, edge), (x, end), (np.nan, np.nan),
+                             (x - 0.125, end), (x + 0.125, end), (np.nan, np.nan)]
+            fliers.append(np.column_stack((np.full(len(stats['fliers']), x), stats['fliers'])))
+        for line, points in ((boxes['medians'], medians), (boxes['whiskers'], whiskers)):
+            points = np.array(points).reshape(-1, 2)
+            line.set_data(points[:, 0], points[:, 1])
+        points = np.concatenate(fliers) if fliers else np.empty((0, 2))
+        boxes['fliers'].set_data(points[:, 0], points[:, 1])
+
+    def _fit(self, get_limits, set_limits, low, high):
+        limits = _fit_limits(get_limits(), low, high)
+        if limits is None:
+            return False
+        set_limits(*limits)
+        return True
+
+    def update(self):
+        """Ask for a frame: now if one is due, otherwise once the frame interval has passed."""
+        if self._pending is not None:
+            return
+        wait = self._last_frame + self.interval - time.monotonic()
+        if wait <= 0:
+            self.render()
+        elif self.widget is not None:
+            self._pending = self.widget.after(int(wait * 1000) + 1, self.render)
+        else:
+            self._pending = True
+
+    def finish(self):
+        """Draw the final frame straight away, with the full price trend downsample."""
+        self._cancel()
+        self.render(exact=True)
+
+    def close(self):
+        self._cancel()
+        self.canvas.mpl_disconnect(self._draw_id)
+
+    def _cancel(self):
+        if self._pending is not None and self.widget is not None:
+            self.widget.after_cancel(self._pending)
+        self._pending = None
+
+    def render(self, exact=False):
+        """Update every artist from the data and blit; the background is redrawn only if limits changed."""
+        self._pending = None
+        self._last_frame = time.monotonic()
+        data = self.data
+        if not len(data):
+            # Empty axes until the first sales arrive
+            if self._background is None:
+                self.canvas.draw()
+            return
+        prices = data.all_prices
+        low, high = prices.values[0], prices.values[-1]
+
+        rescale = False
+        first_dates, last_dates = [], []
+        for variant, scatter in self.scatters.items():
+            dates, variant_prices = data.trend(variant, exact)
+            days = dates.astype(np.int64)
+            scatter.set_offsets(np.column_stack((days, variant_prices)))
+            if len(days):
+                first_dates.append(days.min())
+                last_dates.append(days.max())
+        if first_dates:
+            rescale |= self._fit(self.trend_ax.get_xlim, self.trend_ax.set_xlim, min(first_dates), max(last_dates))
+        for ax in (self.trend_ax, self.transmission_ax, self.engine_ax):
+            rescale |= self._fit(ax.get_ylim, ax.set_ylim, low, high)
+
+        self._update_boxes(self.transmission_boxes, [data.manual_prices, data.auto_prices])
+        self._update_boxes(self.engine_boxes, [data.variant_prices[variant] for variant in VARIANTS])
+
+        counts, edges = prices.histogram(HIST_BINS)
+        self.histogram.set_data(counts, edges)
+        left, right, zeros = edges[:-1], edges[1:], np.zeros_like(counts)
+        self.histogram_edges.set_data(np.column_stack((left, left, right, right)).ravel(),
+                                      np.column_stack((zeros, counts, counts, zeros)).ravel())
+        mean_price = prices.mean()
+        # Upper median, as chart_data.median
+        median_price = prices.values[len(prices) // 2]
+        self.mean_line.set_xdata([mean_price, mean_price])
+        self.median_line.set_xdata([median_price, median_price])
+        self.dist_values.set_text(f'Mean: ${mean_price:,.0f}\nMedian: ${median_price:,.0f}')
+        rescale |= self._fit(self.dist_ax.get_xlim, self.dist_ax.set_xlim, edges[0], edges[-1])
+        if counts.max() > self.dist_ax.get_ylim()[1]:
+            self.dist_ax.set_ylim(0, counts.max() * 1.5)
+            rescale = True
+
+        if rescale or self._background is None or not self.blit:
+            # _on_draw caches the new background and draws the artists over it
+            self.redraws += 1
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_artists()
+            self.canvas.blit(self.figure.bbox)
+        self.frames += 1
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.figure.draw_artist(self.trend_legend)
+        self._legend_pixels = self.canvas.copy_from_bbox(
+            self.trend_legend.get_window_extent(self.canvas.get_renderer()))
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self._artists:
+            self.figure.draw_artist(artist)
+        self.canvas.restore_region(self._legend_pixels)
@@ -1,22 +1,23 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk
 import threading
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from datetime import datetime
-import re
+from contextlib import ExitStack
+import numpy as np
+from listing_parser import parse_listing
+from listing_store import ListingStore
+from ui_queue import UIUpdateQueue
+from run_metrics import RunMetrics, count_webdriver_calls, profiled
+from chart_data import prepare_chart_data
+from live_charts import LiveChartData, LiveCharts
+from config import BASE_URL, MIN_YEAR, MAX_YEAR, CHART_MAX_POINTS
 
 class AudiAnalysisGUI:
-    def __init__(self, root):
+    def __init__(self, root, metrics_path=None, profile_path=None, load_saved=True):
         self.root = root
+        # Stage timings are appended here as JSON lines; profile_path "" profiles without saving
+        self.metrics_path = metrics_path
+        self.profile_path = profile_path
         self.root.title("First-Gen Audi R8 Market Analysis (2008-2015)")
         self.root.geometry("1200x800")
         
@@ -38,7 +39,16 @@ class AudiAnalysisGUI:
         self.setup_graphs_tab()
         
         # Data storage
-        self.listings_data = []
+        self.listings_data = ListingStore()
+        
+        # Updates from the analysis thread are batched onto the Tk thread
+        self.ui_queue = UIUpdateQueue(root)
+        self.ui_queue.start()
+
+        # Show the last saved sales as soon as they are read; a crawl replaces them
+        self.analysis_started = False
+        if load_saved:
+            threading.Thread(target=self.load_saved_listings, daemon=True).start()
 
     def setup_data_tab(self):
         # Control frame
@@ -59,59 +69,89 @@ class AudiAnalysisGUI:
         self.results_text.pack(padx=10, pady=5, expand=True, fill='both')
 
     def setup_graphs_tab(self):
-        self.figure = plt.Figure(figsize=(12, 8), dpi=100)
+        # matplotlib is imported and the figure built the first time the tab is shown
+        self.figure = None
+        self.canvas = None
+        # During and after a crawl the graphs are drawn live from live_data instead
+        self.live_data = None
+        self.live_charts = None
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+    def on_tab_changed(self, event=None):
+        if self.canvas is not None or self.notebook.select() != str(self.graphs_tab):
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        self.figure = Figure(figsize=(12, 8), dpi=100)
         self.canvas = FigureCanvasTkAgg(self.figure, self.graphs_tab)
         self.canvas.get_tk_widget().pack(expand=True, fill='both')
+        if self.live_data is not None:
+            self.start_live_graphs()
+        elif len(self.listings_data):
+            self.update_graphs()
+
+    def load_saved_listings(self):
+        # pyarrow and pandas load here, off the Tk thread
+        from sales_dataset import load_last_sales
+        try:
+            store, path = load_last_sales()
+        except Exception as e:
+            self.update_status(f"Could not load saved sales: {str(e)}")
+            return
+        if store is not None:
+            self.ui_queue.call(lambda: self.show_saved_listings(store, path))
+
+    def show_saved_listings(self, store, path):
+        if self.analysis_started:
+            return
+        self.listings_data = store
+        self.status_label.config(text=f"Showing {len(store)} saved sales from {path}")
+        self.update_results(f"Saved sales from {path}\n")
+        self.show_summary(store)
+        self.update_graphs()
+
+    def show_summary(self, store):
+        self.update_results("\nSummary Statistics:\n")
+        self.update_results(f"Total listings processed: {len(store)}\n")
+        
+        # Find highest sales
+        top_sales = np.argsort(-store.prices, kind='stable')[:5]
+        self.update_results("\nTop 5 Highest Sales:\n")
+        for i, row in enumerate(top_sales, 1):
+            self.update_results(f"{i}. {store.names[row]} - ${store.prices[row]:,.2f}\n")
 
     def start_analysis(self):
+        self.analysis_started = True
+        self.ui_queue.reset_stats()
+        self.live_data = LiveChartData(CHART_MAX_POINTS)
+        if self.canvas is not None:
+            self.start_live_graphs()
         self.analyze_button.config(state='disabled')
         self.status_label.config(text="Starting analysis...")
         self.progress.start()
-        self.results_text.delete(1.0, tk.END)
+        self.ui_queue.clear_text(self.results_text)
         thread = threading.Thread(target=self.run_analysis)
         thread.daemon = True
         thread.start()
 
-    def extract_year(self, name):
-        year_match = re.search(r'\b(20\d{2})\b', name)
-        return int(year_match.group(1)) if year_match else None
+    def start_live_graphs(self):
+        if self.live_charts is not None:
+            self.live_charts.close()
+        self.live_charts = LiveCharts(self.figure, self.canvas, self.live_data, widget=self.root)
+        self.live_charts.finish()
 
-    def parse_listing_data(self, name, details):
-        # First check the year to ensure it's first gen
-        year = self.extract_year(name)
-        if not year or year < 2008 or year > 2015:
-            return None
-            
-        # Extract price
-        price_match = re.search(r"\$([0-9,]+)", details)
-        if not price_match:
-            return None
-        price = float(price_match.group(1).replace(',', ''))
-        
-        # Extract date
-        date_match = re.search(r"on (\d{1,2}/\d{1,2}/\d{2})", details)
-        if not date_match:
-            return None
-        date_str = date_match.group(1)
-        try:
-            date = datetime.strptime(date_str, "%m/%d/%y")
-        except ValueError:
-            return None
-        
-        # Determine transmission and engine
-        is_manual = '6-Speed' in name
-        is_v10 = 'V10' in name
-        
-        return {
-            'name': name,
-            'year': year,
-            'price': price,
-            'date': date,
-            'is_manual': is_manual,
-            'is_v10': is_v10
-        }
+    def add_live_points(self, rows):
+        self.live_data.add(rows)
+        if self.live_charts is not None:
+            self.live_charts.update()
 
     def update_graphs(self):
+        # Until the Graphs tab is first shown there is nothing to draw on
+        if self.canvas is None:
+            return
+        if self.live_charts is not None:
+            self.live_charts.close()
+            self.live_charts = None
         self.figure.clear()
         
         # Create subplots
@@ -120,30 +160,20 @@ class AudiAnalysisGUI:
         engine_compare_ax = self.figure.add_subplot(223)
         price_dist_ax = self.figure.add_subplot(224)
         
-        # Filter valid listings and sort by date
-        valid_listings = sorted([l for l in self.listings_data if l['date']], key=lambda x: x['date'])
+        data = prepare_chart_data(self.listings_data, CHART_MAX_POINTS)
         
         # 1. Price Trend Over Time with different colors for each variant
-        categories = {
-            'V10 Manual': [(l['date'], l['price']) for l in valid_listings if l['is_v10'] and l['is_manual']],
-            'V10 Auto': [(l['date'], l['price']) for l in valid_listings if l['is_v10'] and not l['is_manual']],
-            'V8 Manual': [(l['date'], l['price']) for l in valid_listings if not l['is_v10'] and l['is_manual']],
-            'V8 Auto': [(l['date'], l['price']) for l in valid_listings if not l['is_v10'] and not l['is_manual']]
-        }
-        
         colors = {'V10 Manual': 'darkred', 'V10 Auto': 'red', 
                  'V8 Manual': 'darkblue', 'V8 Auto': 'blue'}
         markers = {'V10 Manual': 'o', 'V10 Auto': '^', 
                   'V8 Manual': 'o', 'V8 Auto': '^'}
         
-        for category, data in categories.items():
-            if data:
-                dates, prices = zip(*data)
-                price_trend_ax.scatter(dates, prices, 
-                                     label=category,
-                                     color=colors[category],
-                                     marker=markers[category],
-                                     alpha=0.6)
+        for category, (dates, prices) in data.trends.items():
+            price_trend_ax.scatter(dates, prices, 
+                                 label=category,
+                                 color=colors[category],
+                                 marker=markers[category],
+                                 alpha=0.6)
         
         price_trend_ax.set_title('First-Gen R8 Price Trends by Variant')
         price_trend_ax.set_xlabel('Sale Date')
@@ -153,12 +183,12 @@ class AudiAnalysisGUI:
         price_trend_ax.grid(True, linestyle='--', alpha=0.7)
         
         # 2. Box plots for price distributions
-        manual_prices = [l['price'] for l in valid_listings if l['is_manual']]
-        auto_prices = [l['price'] for l in valid_listings if not l['is_manual']]
-        v10_manual = [l['price'] for l in valid_listings if l['is_v10'] and l['is_manual']]
-        v10_auto = [l['price'] for l in valid_listings if l['is_v10'] and not l['is_manual']]
-        v8_manual = [l['price'] for l in valid_listings if not l['is_v10'] and l['is_manual']]
-        v8_auto = [l['price'] for l in valid_listings if not l['is_v10'] and not l['is_manual']]
+        manual_prices = data.manual_prices
+        auto_prices = data.auto_prices
+        v10_manual = data.variant_prices['V10 Manual']
+        v10_auto = data.variant_prices['V10 Auto']
+        v8_manual = data.variant_prices['V8 Manual']
+        v8_auto = data.variant_prices['V8 Auto']
         
         # Create box plots
         bp1 = transmission_compare_ax.boxplot([manual_prices, auto_prices],
@@ -188,10 +218,9 @@ class AudiAnalysisGUI:
         engine_compare_ax.grid(True, linestyle='--', alpha=0.7)
         
         # 4. Price distribution histogram
-        all_prices = [l['price'] for l in valid_listings]
-        price_dist_ax.hist(all_prices, bins=30, color='skyblue', edgecolor='black')
-        mean_price = sum(all_prices) / len(all_prices)
-        median_price = sorted(all_prices)[len(all_prices)//2]
+        price_dist_ax.hist(data.all_prices, bins=30, color='skyblue', edgecolor='black')
+        mean_price = data.mean_price
+        median_price = data.median_price
         
         price_dist_ax.axvline(mean_price, color='red', linestyle='--', 
                             label=f'Mean: ${mean_price:,.0f}')
@@ -208,98 +237,111 @@ class AudiAnalysisGUI:
         self.canvas.draw()
 
     def run_analysis(self):
+        metrics = RunMetrics()
+        try:
+            with ExitStack() as stack:
+                if self.profile_path is not None:
+                    stack.enter_context(profiled(self.profile_path or None))
+                self.analyze(metrics)
+            # How far the UI fell behind the analysis thread during the run
+            queue = self.ui_queue
+            metrics.count("ui_queue.peak_depth", queue.peak_depth)
+            metrics.count("ui_queue.flushes", queue.flushes)
+            metrics.count("ui_queue.max_latency_ms", round(queue.max_latency * 1000))
+            self.update_results("\nRun metrics:\n" + metrics.summary() + "\n")
+            if self.metrics_path:
+                metrics.write_jsonl(self.metrics_path)
+        finally:
+            self.ui_queue.call(self.finish_analysis)
+
+    def analyze(self, metrics):
         try:
             self.update_status("Initializing browser...")
+            # Selenium and webdriver_manager load only once a crawl starts
+            from driver_setup import get_driver_pool
+            from web_scraper import set_year_filter, load_all_listings
             
-            options = Options()
-            options.add_experimental_option("detach", True)
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), 
-                                   options=options)
-            
-            self.update_status("Navigating to website...")
-            driver.get("https://bringatrailer.com/audi/r8/")
-            driver.maximize_window()
-            
-            self.update_status("Setting year filter...")
-            year_range_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//*[text()='Year Range']"))
-            )
-            year_range_button.click()
-            
-            min_year_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "/html/body/main/div[2]/div/div[2]/div/div/div[1]/div/div[2]/div[3]/div[4]/div[2]/div/input[1]"))
-            )
-            min_year_field.send_keys("2008")
-            
-            max_year_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "/html/body/main/div[2]/div/div[2]/div/div/div[1]/div/div[2]/div[3]/div[4]/div[2]/div/input[2]"))
-            )
-            max_year_field.send_keys("2015")
-            
-            self.update_status("Loading listings...")
-            self.update_results("Beginning data collection for First-Gen R8 (2008-2015)...\n")
-            
-            # Load all listings
-            while True:
-                try:
-                    show_more_button = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, "/html/body/main/div[2]/div/div[2]/div/div/div[2]/div[2]/button"))
-                    )
-                    show_more_button.click()
-                    time.sleep(1/3)
-                except Exception:
-                    break
-            
-            self.update_status("Processing listings...")
-            listings = driver.find_elements(By.CSS_SELECTOR, 
-                ".listings-container.auctions-grid .listing-card.bg-white-transparent")
-            
-            # Process listings
-            self.listings_data = []
-            for listing in listings:
-                try:
-                    name = listing.find_element(By.CSS_SELECTOR, ".content-main h3").text
-                    details = listing.find_element(By.CSS_SELECTOR, ".content-main .item-results").text
-                    
-                    if "bid to" not in details.lower():  # Only include completed sales
-                        listing_data = self.parse_listing_data(name, details)
-                        if listing_data:  # Only add if it's a valid first-gen listing
-                            self.listings_data.append(listing_data)
-                            self.update_results(f"Processed: {name} - ${listing_data['price']:,.2f}\n")
-                except Exception as e:
-                    print(f"Error processing listing: {str(e)}")
-                    continue
+            with ExitStack() as stack:
+                # Lease a warm headless browser instead of cold-starting Chrome
+                with metrics.span("driver"):
+                    driver = stack.enter_context(get_driver_pool().lease())
+                stack.enter_context(count_webdriver_calls(driver, metrics))
+
+                self.update_status("Navigating to website...")
+                with metrics.span("navigate"):
+                    driver.get(BASE_URL)
+                    driver.maximize_window()
+                
+                self.update_status("Setting year filter...")
+                with metrics.span("year_filter"):
+                    set_year_filter(driver, MAX_YEAR, min_year=MIN_YEAR)
+                
+                self.update_status("Loading listings...")
+                self.update_results("Beginning data collection for First-Gen R8 (2008-2015)...\n")
+                
+                # Each page is parsed as soon as it loads and its sales drawn on the live graphs
+                self.listings_data = ListingStore()
+                def on_page(page):
+                    with metrics.span("parse") as span:
+                        rows = self.process_page(page)
+                        span["items"] = len(page)
+                    if rows:
+                        self.ui_queue.call(self.add_live_points, rows)
+                timings = load_all_listings(driver, on_page=on_page, metrics=metrics)
+                self.update_results(f"Loaded {len(timings)} pages in {sum(t.seconds for t in timings):.1f}s\n")
             
             # Print summary statistics
-            self.update_results("\nSummary Statistics:\n")
-            self.update_results(f"Total listings processed: {len(self.listings_data)}\n")
-            
-            # Find highest sales
-            top_sales = sorted(self.listings_data, key=lambda x: x['price'], reverse=True)[:5]
-            self.update_results("\nTop 5 Highest Sales:\n")
-            for i, sale in enumerate(top_sales, 1):
-                self.update_results(f"{i}. {sale['name']} - ${sale['price']:,.2f}\n")
-            
-            self.update_status("Generating graphs...")
-            self.root.after(0, self.update_graphs)
+            self.show_summary(self.listings_data)
             self.update_status("Analysis complete!")
             
         except Exception as e:
             self.update_status(f"Error: {str(e)}")
-        finally:
-            driver.quit()
-            self.analyze_button.config(state='normal')
-            self.progress.stop()
+
+    def process_page(self, page):
+        """Parse one page of (name, details) pairs into listings_data; returns the sales added."""
+        rows = []
+        for name, details in page:
+            try:
+                if "bid to" not in details.lower():  # Only include completed sales
+                    listing_data = parse_listing(name, details)
+                    if listing_data:  # Only add if it's a valid first-gen listing
+                        self.listings_data.append(details=details, **listing_data)
+                        rows.append(listing_data)
+                        self.update_results(f"Processed: {name} - ${listing_data['price']:,.2f}\n")
+            except Exception as e:
+                print(f"Error processing listing: {str(e)}")
+                continue
+        return rows
+
+    def finish_analysis(self):
+        # The live graphs already hold every sale; this only draws the final frame
+        if self.live_charts is not None:
+            self.live_charts.finish()
+        self.analyze_button.config(state='normal')
+        self.progress.stop()
 
     def update_status(self, message):
-        self.root.after(0, lambda: self.status_label.config(text=message))
+        self.ui_queue.set_label(self.status_label, message)
 
     def update_results(self, message):
-        self.root.after(0, lambda: self.results_text.insert(tk.END, message))
+        self.ui_queue.append_text(self.results_text, message)
 
 def main():
+    parser = argparse.ArgumentParser(description="First-gen Audi R8 market analysis")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="append each run's stage timings and counters to FILE as JSON lines")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="run each analysis under cProfile, print the top functions and optionally save the stats to FILE")
+    parser.add_argument("--no-saved", action="store_true",
+                        help="start empty instead of showing the last saved CSV or Parquet dataset")
+    parser.add_argument("--refresh", action="store_true",
+                        help="start a crawl in the background as soon as the window is up")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = AudiAnalysisGUI(root)
+    app = AudiAnalysisGUI(root, metrics_path=args.metrics, profile_path=args.profile, load_saved=not args.no_saved)
+    if args.refresh:
+        root.after_idle(app.start_analysis)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""
+Functions for extracting listing cards from a saved page snapshot
+"""
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from typing import List, Optional, Tuple
+
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'source', 'track', 'wbr'
+}
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'li',
+    'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul'
+}
+SKIP_TAGS = {'script', 'style', 'template', 'noscript'}
+
+_SPACES = re.compile(r'[ \t\r\f\v ]+')
+
+
+def normalize_text(raw: str) -> str:
+    """Collapse whitespace the way WebElement.text renders it."""
+    lines = (_SPACES.sub(' ', line).strip() for line in raw.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+class _ListingCardParser(HTMLParser):
+    """Collects the name and results text of every listing card in one pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards = []
+        self._stack = []
+        self._card = None
+        self._container_depth = None
+        self._card_depth = None
+        self._content_depth = None
+        self._field = None
+        self._field_depth = None
+        self._skip_depth = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == 'br' and self._field:
+                self._card[self._field].append('\n')
+            return
+
+        classes = set((dict(attrs).get('class') or '').split())
+        self._stack.append(tag)
+        depth = len(self._stack)
+
+        if self._skip_depth is None and tag in SKIP_TAGS:
+            self._skip_depth = depth
+        if self._field and tag in BLOCK_TAGS:
+            self._card[self._field].append('\n')
+
+        if self._container_depth is None:
+            if {'listings-container', 'auctions-grid'} <= classes:
+                self._container_depth = depth
+        elif self._card_depth is None:
+            if {'listing-card', 'bg-white-transparent'} <= classes:
+                self._card_depth = depth
+                self._card = {'name': None, 'details': None, 'href': dict(attrs).get('href')}
+        elif self._content_depth is None:
+            if 'content-main' in classes:
+                self._content_depth = depth
+        elif self._field is None:
+            # Selenium's find_element returns the first match, so only
+            # capture each field once per card.
+            if tag == 'h3' and self._card['name'] is None:
+                self._start_field('name', depth)
+            elif 'item-results' in classes and self._card['details'] is None:
+                self._start_field('details', depth)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or tag not in self._stack:
+            return
+        # Pop back to the matching tag, tolerating unclosed children.
+        while self._stack:
+            depth = len(self._stack)
+            popped = self._stack.pop()
+            if self._field and popped in BLOCK_TAGS and depth != self._field_depth:
+                self._card[self._field].append('\n')
+            self._close_depth(depth)
+            if popped == tag:
+                break
+
+    def handle_data(self, data):
+        if self._field and self._skip_depth is None:
+            # Source newlines are plain whitespace; only <br> and block
+            # boundaries start a new rendered line.
+            self._card[self._field].append(data.replace('\n', ' '))
+
+    def _start_field(self, field, depth):
+        self._field = field
+        self._field_depth = depth
+        self._card[field] = []
+
+    def _close_depth(self, depth):
+        if self._skip_depth == depth:
+            self._skip_depth = None
+        if self._field_depth == depth:
+            self._card[self._field] = normalize_text(''.join(self._card[self._field]))
+            self._field = None
+            self._field_depth = None
+        if self._content_depth == depth:
+            self._content_depth = None
+        if self._card_depth == depth:
+            self.cards.append(self._card)
+            self._card = None
+            self._card_depth = None
+        if self._container_depth == depth:
+            self._container_depth = None
+
+
+def parse_listing_cards(html: str, urls=None, base_url=None) -> List[Optional[Tuple[str, str]]]:
+    """
+    Return a (name, details) pair for every listing card in a page snapshot.
+
+    Cards missing either element are returned as None so callers can skip
+    them, just like the per-element lookups that raise NoSuchElementException.
+    If urls is a dict, each card's link, resolved against base_url, is
+    stored in it under its pair.
+    """
+    parser = _ListingCardParser()
+    parser.feed(html)
+    parser.close()
+    if urls is not None:
+        for card in parser.cards:
+            if card['name'] is not None and card['details'] is not None and card['href']:
+                urls[(card['name'], card['details'])] = urljoin(base_url or '', card['href'])
+    return [
+        (card['name'], card['details'])
+        if card['name'] is not None and card['details'] is not None else None
+        for card in parser.cards
+    ]
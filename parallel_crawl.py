@@ -0,0 +1,131 @@
+"""
+Parallel crawl that shards the year range across worker processes
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List
+from config import (
+    BASE_URL, MIN_YEAR, MAX_YEAR, EXTRACTION_MODE, get_headless_chrome_options,
+    CRAWL_WORKERS, CRAWL_MIN_REQUEST_INTERVAL, CRAWL_MAX_PER_HOST
+)
+from driver_setup import initialize_driver
+from saveCSV import parse_listing_data, get_csv_path, write_csv
+from web_scraper import set_year_filter, load_all_listings, extract_listing_texts
+
+class HostRateLimiter:
+    """
+    Politeness limits shared by every worker process: at most max_concurrent
+    shards talk to the host at once, and successive requests (page loads and
+    "Show More" clicks) are spaced at least min_interval seconds apart.
+    """
+
+    def __init__(self, min_interval, max_concurrent, context=None):
+        context = context or multiprocessing.get_context()
+        self.min_interval = min_interval
+        self._lock = context.Lock()
+        self._next_request = context.Value('d', 0.0, lock=False)
+        self._slots = context.BoundedSemaphore(max_concurrent)
+
+    def wait(self):
+        with self._lock:
+            now = time.time()
+            delay = self._next_request.value - now
+            self._next_request.value = max(now, self._next_request.value) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def host_slot(self):
+        with self._slots:
+            yield
+
+@dataclass
+class ShardResult:
+    year: int
+    rows: List[Dict] = field(default_factory=list)
+    pages: int = 0
+    seconds: float = 0.0
+
+_limiter = None
+
+def _init_worker(limiter):
+    global _limiter
+    _limiter = limiter
+
+def year_shards(min_year=MIN_YEAR, max_year=MAX_YEAR):
+    return list(range(int(min_year), int(max_year) + 1))
+
+def crawl_year(year, base_url=BASE_URL):
+    """Crawl a single model year with its own headless browser."""
+    start = time.monotonic()
+    result = ShardResult(year)
+    with _limiter.host_slot():
+        driver = initialize_driver(get_headless_chrome_options())
+        try:
+            _limiter.wait()
+            driver.get(base_url)
+            set_year_filter(driver, str(year), min_year=str(year))
+            timings = load_all_listings(driver, throttle=_limiter.wait)
+            pairs = extract_listing_texts(driver, EXTRACTION_MODE)
+        finally:
+            driver.quit()
+
+    for name, details in pairs:
+        if "bid to" not in details.lower():
+            row = parse_listing_data(name, details)
+            if row:
+                result.rows.append(row)
+    result.pages = len(timings)
+    result.seconds = time.monotonic() - start
+    return result
+
+def merge_shards(results):
+    """Merge shard rows, dropping duplicate (name, date) sales, newest first."""
+    merged = {}
+    for result in results:
+        for row in result.rows:
+            merged.setdefault((row['name'], row['date']), row)
+    return sorted(merged.values(), key=lambda row: row['date'], reverse=True)
+
+def parallel_crawl(base_url=BASE_URL, min_year=MIN_YEAR, max_year=MAX_YEAR,
+                   workers=CRAWL_WORKERS, min_interval=CRAWL_MIN_REQUEST_INTERVAL,
+                   max_per_host=CRAWL_MAX_PER_HOST):
+    """Crawl every year in [min_year, max_year] in parallel; return merged rows and shard results."""
+    context = multiprocessing.get_context("spawn")
+    limiter = HostRateLimiter(min_interval, max_per_host, context)
+    shards = year_shards(min_year, max_year)
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards)), mp_context=context,
+                             initializer=_init_worker, initargs=(limiter,)) as executor:
+        futures = {executor.submit(crawl_year, year, base_url): year for year in shards}
+        for future in as_completed(futures):
+            year = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Shard {year} failed: {e}")
+                continue
+            print(f"{year}: {len(result.rows)} sales from {result.pages} pages in {result.seconds:.1f}s")
+            results.append(result)
+    return merge_shards(results), results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl first-gen Audi R8 sales in parallel, one year per worker")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--workers", type=int, default=CRAWL_WORKERS)
+    parser.add_argument("--min-interval", type=float, default=CRAWL_MIN_REQUEST_INTERVAL,
+                        help="minimum seconds between requests to the host across all workers")
+    parser.add_argument("--max-per-host", type=int, default=CRAWL_MAX_PER_HOST,
+                        help="maximum shards crawling the host at the same time")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    rows, _ = parallel_crawl(args.base_url, workers=args.workers,
+                             min_interval=args.min_interval, max_per_host=args.max_per_host)
+    csv_path = get_csv_path()
+    write_csv(csv_path, rows)
+    print(f"Scraped {len(rows)} listings in {time.monotonic() - start:.1f}s. Data saved to {csv_path}")
@@ -0,0 +1,147 @@
+"""
+Running price statistics and quantile sketches that can be merged
+"""
+import math
+import numpy as np
+
+# Quantiles are estimated to within this relative error of the true value
+QUANTILE_RELATIVE_ACCURACY = 0.01
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch in the style of DDSketch.
+
+    Each positive price is counted in bucket ceil(log_gamma(price)), so a
+    bucket's midpoint is within relative_accuracy of every price in it.
+    Memory depends on the price range, not the number of listings, and two
+    sketches with the same accuracy merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = QUANTILE_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def add_array(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values > 0]
+        self.count += len(values)
+        self.zero_count += len(values) - len(positive)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma), return_counts=True)
+        for key, count in zip(keys.astype(np.int64).tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other: 'QuantileSketch'):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile (0 <= q <= 1), or NaN if the sketch is empty."""
+        if not self.count:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+class PriceStats:
+    """
+    Count, sum, min, max and variance of a stream of prices, each updated
+    in O(1) per price (Welford's algorithm), plus a QuantileSketch for
+    medians and percentiles. Partial stats combine exactly with merge().
+    """
+
+    def __init__(self, relative_accuracy: float = QUANTILE_RELATIVE_ACCURACY):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, price: float):
+        self.count += 1
+        self.total += price
+        if price < self.min:
+            self.min = price
+        if price > self.max:
+            self.max = price
+        delta = price - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (price - self._mean)
+        self.sketch.add(price)
+
+    def add_array(self, prices: np.ndarray):
+        prices = np.asarray(prices, dtype=np.float64)
+        if not len(prices):
+            return
+        batch = PriceStats(self.sketch.relative_accuracy)
+        batch.count = len(prices)
+        batch.total = float(prices.sum())
+        batch.min = float(prices.min())
+        batch.max = float(prices.max())
+        batch._mean = batch.total / batch.count
+        batch._m2 = float(np.square(prices - batch._mean).sum())
+        batch.sketch.add_array(prices)
+        self.merge(batch)
+
+    def merge(self, other: 'PriceStats'):
+        """Fold another PriceStats into this one (Chan et al. parallel update)."""
+        if not other.count:
+            self.sketch.merge(other.sketch)
+            return
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    def copy(self) -> 'PriceStats':
+        stats = PriceStats(self.sketch.relative_accuracy)
+        stats.merge(self)
+        return stats
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    @property
+    def variance(self) -> float:
+        """Sample variance; 0 with fewer than two prices."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float) -> float:
+        return self.sketch.quantile(q)
+
+    @property
+    def median(self) -> float:
+        return self.quantile(0.5)
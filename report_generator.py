@@ -1,30 +1,245 @@
 """
 Functions for generating analysis reports
 """
-from typing import List, Tuple
-from data_processor import ListingData
+import argparse
+import csv
+import io
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from listing_store import CategoryView, ListingStore, MANUAL, V10
 
-def calculate_average(listings: List[Tuple[ListingData, float]]) -> float:
-    if not listings:
-        return 0
-    return sum(price for _, price in listings) / len(listings)
+# Dimensions a report can group by, and the percentiles reported by default
+DIMENSIONS = ('year', 'engine', 'transmission', 'quarter')
+DEFAULT_PERCENTILES = (10, 25, 75, 90)
+REPORT_COLUMNS = ('price', 'date', 'year', 'is_manual', 'is_v10')
 
-def print_category_stats(category_name: str, manual_listings: List[Tuple[ListingData, float]], 
-                        auto_listings: List[Tuple[ListingData, float]]):
+def calculate_average(listings: CategoryView) -> float:
+    return listings.mean()
+
+def _transmission_rows(manual_listings: CategoryView, auto_listings: CategoryView) -> Dict[str, 'ReportRow']:
+    """store_report rows of the two views keyed 'Manual' and 'Auto'; an empty view has no row."""
+    rows = manual_listings.mask | auto_listings.mask
+    report = store_report(manual_listings.store, by=('transmission',), percentiles=(), rows=rows)
+    return {row.key['transmission']: row for row in report.rows}
+
+def print_category_stats(category_name: str, manual_listings: CategoryView, 
+                        auto_listings: CategoryView):
+    rows = _transmission_rows(manual_listings, auto_listings)
+    manual, auto = rows.get('Manual'), rows.get('Auto')
     print(f"\n{category_name}")
     print("-------------------------------------------------------------")
-    print(f"Total number with manual transmission: {len(manual_listings)}")
-    print(f"Total number with automatic transmission: {len(auto_listings)}")
-    print(f"Average price with manual transmission: ${calculate_average(manual_listings):.2f}")
-    print(f"Average price with automatic transmission: ${calculate_average(auto_listings):.2f}")
-
-def print_price_extremes(category_name: str, manual_listings: List[Tuple[ListingData, float]], 
-                        auto_listings: List[Tuple[ListingData, float]]):
-    if manual_listings:
-        manual_prices = [price for _, price in manual_listings]
-        print(f"Manual transmission lowest price: ${min(manual_prices):.2f}")
-        print(f"Manual transmission highest price: ${max(manual_prices):.2f}")
-    if auto_listings:
-        auto_prices = [price for _, price in auto_listings]
-        print(f"Automatic transmission lowest price: ${min(auto_prices):.2f}")
-        print(f"Automatic transmission highest price: ${max(auto_prices):.2f}")
+    print(f"Total number with manual transmission: {manual.count if manual else 0}")
+    print(f"Total number with automatic transmission: {auto.count if auto else 0}")
+    print(f"Average price with manual transmission: ${manual.mean if manual else 0:.2f}")
+    print(f"Average price with automatic transmission: ${auto.mean if auto else 0:.2f}")
+    if manual:
+        print(f"Median price with manual transmission: ${manual.median:.2f}")
+    if auto:
+        print(f"Median price with automatic transmission: ${auto.median:.2f}")
+
+def print_price_extremes(category_name: str, manual_listings: CategoryView, 
+                        auto_listings: CategoryView):
+    rows = _transmission_rows(manual_listings, auto_listings)
+    manual, auto = rows.get('Manual'), rows.get('Auto')
+    if manual:
+        print(f"Manual transmission lowest price: ${manual.min:.2f}")
+        print(f"Manual transmission highest price: ${manual.max:.2f}")
+    if auto:
+        print(f"Automatic transmission lowest price: ${auto.min:.2f}")
+        print(f"Automatic transmission highest price: ${auto.max:.2f}")
+
+@dataclass
+class ReportRow:
+    key: Dict[str, object]
+    count: int
+    mean: float
+    median: float
+    min: float
+    max: float
+    percentiles: Dict[int, float] = field(default_factory=dict)
+
+    def record(self) -> dict:
+        """Flat dict of the key and statistics, prices rounded to cents."""
+        record = dict(self.key, count=self.count)
+        record.update((name, round(getattr(self, name), 2)) for name in ('mean', 'median', 'min', 'max'))
+        record.update((f"p{p:g}", round(value, 2)) for p, value in self.percentiles.items())
+        return record
+
+@dataclass
+class Report:
+    """Price statistics per group, in group order; render with to_text, to_csv or to_json."""
+    dimensions: Tuple[str, ...]
+    percentiles: Tuple[float, ...]
+    rows: List[ReportRow]
+
+    def records(self) -> List[dict]:
+        return [row.record() for row in self.rows]
+
+    def columns(self) -> List[str]:
+        return list(self.dimensions) + ['count', 'mean', 'median', 'min', 'max'] + [f"p{p:g}" for p in self.percentiles]
+
+    def to_csv(self) -> str:
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=self.columns(), lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(self.records())
+        return out.getvalue()
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'dimensions': list(self.dimensions),
+            'percentiles': list(self.percentiles),
+            'rows': self.records()
+        }, indent=1)
+
+    def to_text(self) -> str:
+        columns = self.columns()
+        cells = [[_text_cell(column, record[column]) for column in columns] for record in self.records()]
+        widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+        lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+        lines.append("  ".join("-" * width for width in widths))
+        lines.extend("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in cells)
+        return "\n".join(lines)
+
+def _text_cell(column, value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"${value:,.0f}"
+    return str(value)
+
+def _dimension_codes(name, dates, years, flags):
+    """Integer code per row and a label per code; -1 marks rows with no value."""
+    if name == 'year':
+        codes = years.astype(np.int64)
+        codes[codes <= 0] = -1
+        return codes, lambda code: int(code)
+    if name == 'engine':
+        return ((flags & V10) != 0).astype(np.int64), lambda code: 'V10' if code else 'V8'
+    if name == 'transmission':
+        return ((flags & MANUAL) != 0).astype(np.int64), lambda code: 'Manual' if code else 'Auto'
+    if name == 'quarter':
+        months = dates.astype('datetime64[M]').astype(np.int64)
+        codes = np.where(np.isnat(dates), -1, months // 3)
+        return codes, lambda code: f"{1970 + code // 4}Q{code % 4 + 1}"
+    raise ValueError(f"Unknown report dimension {name!r}; expected one of {', '.join(DIMENSIONS)}")
+
+def group_report(prices, dates, years, flags, by: Sequence[str] = ('engine', 'transmission'),
+                 percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Report:
+    """
+    Count, mean, median, min, max and percentiles of price for every
+    combination of the `by` dimensions present in the columns.
+
+    Each dimension is reduced to small integer codes and the codes are
+    combined into one group id per row. A single lexsort by (group, price)
+    then puts every group's prices in order, so all statistics come from
+    reduceat sums and indexing into the sorted prices: exact percentiles
+    (linearly interpolated, as numpy.percentile) with no Python loop over
+    rows. Rows missing a dimension's value (no date, no year) are grouped
+    under None.
+    """
+    by = tuple(by)
+    percentiles = tuple(percentiles)
+    if not all(0 <= p <= 100 for p in percentiles):
+        raise ValueError(f"Percentiles must be between 0 and 100, got {', '.join(f'{p:g}' for p in percentiles)}")
+    prices = np.asarray(prices, dtype=np.float64)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    years = np.asarray(years)
+    flags = np.asarray(flags, dtype=np.uint8)
+
+    group = np.zeros(len(prices), dtype=np.int64)
+    decoders = []
+    for name in by:
+        codes, label = _dimension_codes(name, dates, years, flags)
+        values, inverse = np.unique(codes, return_inverse=True)
+        group = group * len(values) + inverse.reshape(-1)
+        decoders.append((values, len(values), label))
+
+    order = np.lexsort((prices, group))
+    sorted_prices = prices[order]
+    sorted_group = group[order]
+    starts = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]]) if len(prices) else np.array([], dtype=np.int64)
+    counts = np.diff(np.r_[starts, len(prices)])
+    sums = np.add.reduceat(sorted_prices, starts) if len(starts) else np.array([])
+
+    def at_percentile(p):
+        position = starts + (counts - 1) * (p / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, starts + counts - 1)
+        return sorted_prices[lower] + (sorted_prices[upper] - sorted_prices[lower]) * (position - lower)
+
+    medians = at_percentile(50)
+    quantiles = {p: at_percentile(p) for p in percentiles}
+    rows = []
+    for i, group_id in enumerate(sorted_group[starts].tolist()):
+        key = {}
+        for name, (values, size, label) in zip(reversed(by), reversed(decoders)):
+            code = int(values[group_id % size])
+            key[name] = label(code) if code >= 0 else None
+            group_id //= size
+        rows.append(ReportRow(
+            key={name: key[name] for name in by},
+            count=int(counts[i]),
+            mean=float(sums[i] / counts[i]),
+            median=float(medians[i]),
+            min=float(sorted_prices[starts[i]]),
+            max=float(sorted_prices[starts[i] + counts[i] - 1]),
+            percentiles={p: float(values[i]) for p, values in quantiles.items()}
+        ))
+    return Report(by, percentiles, rows)
+
+def store_report(store: ListingStore, by=('engine', 'transmission'), percentiles=DEFAULT_PERCENTILES,
+                 rows=None) -> Report:
+    """group_report over a ListingStore's columns, or only the rows selected by a boolean mask."""
+    if rows is None:
+        return group_report(store.prices, store.dates, store.years, store.flags, by, percentiles)
+    return group_report(store.prices[rows], store.dates[rows], store.years[rows], store.flags[rows], by, percentiles)
+
+def table_report(table, by=('engine', 'transmission'), percentiles=DEFAULT_PERCENTILES) -> Report:
+    """group_report over an Arrow table of saved sales (see sales_dataset.read_saved_sales)."""
+    flags = (table['is_manual'].to_numpy(zero_copy_only=False).astype(np.uint8) * MANUAL
+             | table['is_v10'].to_numpy(zero_copy_only=False).astype(np.uint8) * V10)
+    years = table['year'].fill_null(0).to_numpy(zero_copy_only=False)
+    return group_report(table['price'].to_numpy(zero_copy_only=False), table['date'].to_numpy(zero_copy_only=False),
+                        years, flags, by, percentiles)
+
+def _number_list(value):
+    return [float(part) for part in value.split(',') if part.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price report over saved sales, grouped by any dimensions")
+    parser.add_argument("--source", help="Parquet dataset directory or saveCSV export (default: whichever was written last)")
+    parser.add_argument("--by", default="engine,transmission",
+                        help=f"comma-separated dimensions from {', '.join(DIMENSIONS)}")
+    parser.add_argument("--percentiles", type=_number_list, default=list(DEFAULT_PERCENTILES),
+                        help="comma-separated percentiles to report besides the median")
+    parser.add_argument("--start", help="first sale date to include, YYYY-MM-DD")
+    parser.add_argument("--end", help="last sale date to include, YYYY-MM-DD")
+    parser.add_argument("--format", choices=["text", "csv", "json"], default="text")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Only the saved-data readers need pyarrow; Tk, Selenium and matplotlib are never loaded
+    from sales_dataset import last_saved_path, read_saved_sales
+    source = args.source or last_saved_path()
+    if source is None:
+        parser.error("No saved sales found; run saveCSV.py first or pass --source")
+    by = [name.strip() for name in args.by.split(',') if name.strip()]
+    table = read_saved_sales(source, args.start, args.end, columns=list(REPORT_COLUMNS))
+    try:
+        report = table_report(table, by, args.percentiles)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rendered = {"text": report.to_text, "csv": report.to_csv, "json": report.to_json}[args.format]()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            f.write(rendered if rendered.endswith("\n") else rendered + "\n")
+    else:
+        sys.stdout.write(rendered if rendered.endswith("\n") else rendered + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Functions for timing the stages of a scrape or analysis run
+"""
+import cProfile
+import json
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None where resource is unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class RunMetrics:
+    """
+    Spans and counters for one run.
+
+    `with metrics.span("paginate") as span:` times a stage; setting
+    span["items"] lets the summary report items per second, and any other
+    keys are kept as fields. A stage that repeats (one extraction per page)
+    may open the same span name many times; the summary totals them.
+    Counters (pages, cards, WebDriver commands) are plain named integers.
+    """
+
+    def __init__(self, run=None):
+        self.run = run or time.strftime("%Y%m%dT%H%M%S")
+        self.started = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+
+    @contextmanager
+    def span(self, name, **fields):
+        record = dict(fields)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            record.update(span=name, start=round(start - self.started, 6), seconds=round(seconds, 6),
+                          peak_rss_mb=peak_rss_mb())
+            self.spans.append(record)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def records(self):
+        """One JSON-ready dict per span, then one for the whole run with the counters."""
+        rows = [dict(record, run=self.run, type="span") for record in self.spans]
+        rows.append({
+            "run": self.run,
+            "type": "run",
+            "seconds": round(time.perf_counter() - self.started, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "counters": dict(self.counters)
+        })
+        return rows
+
+    def write_jsonl(self, path):
+        """Append this run's records to a JSON lines file."""
+        with open(path, "a", encoding="utf-8") as f:
+            for row in self.records():
+                f.write(json.dumps(row) + "\n")
+
+    def summary(self):
+        """Table of stages in the order they first ran, then the counters."""
+        stages = {}
+        for record in self.spans:
+            stage = stages.setdefault(record["span"], {"calls": 0, "seconds": 0.0, "items": 0})
+            stage["calls"] += 1
+            stage["seconds"] += record["seconds"]
+            stage["items"] += record.get("items", 0)
+
+        lines = [f"{'stage':<16}{'calls':>7}{'seconds':>10}{'items':>9}{'items/s':>11}"]
+        for name, stage in stages.items():
+            rate = f"{stage['items'] / stage['seconds']:,.0f}" if stage["items"] and stage["seconds"] else ""
+            items = stage["items"] or ""
+            lines.append(f"{name:<16}{stage['calls']:>7}{stage['seconds']:>10.3f}{items:>9}{rate:>11}")
+        total = time.perf_counter() - self.started
+        rss = peak_rss_mb()
+        lines.append(f"{'total':<16}{'':>7}{total:>10.3f}" + (f"   peak RSS {rss:.0f} MiB" if rss else ""))
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name}: {value}")
+        return "\n".join(lines)
+
+@contextmanager
+def count_webdriver_calls(driver, metrics):
+    """
+    Count every WebDriver command the driver sends, by command name.
+
+    All commands, including those sent by WebElements, go through
+    driver.execute, so it is shadowed on the instance for the duration
+    and restored afterwards since pooled drivers outlive the run.
+    """
+    execute = driver.execute
+
+    def counted(command, params=None):
+        metrics.count(f"webdriver.{command}")
+        return execute(command, params)
+
+    driver.execute = counted
+    try:
+        yield driver
+    finally:
+        del driver.execute
+
+@contextmanager
+def profiled(path=None, top=25):
+    """cProfile the block; dump the stats to path if given and print the top entries."""
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        if path:
+            profile.dump_stats(path)
+            print(f"Profile written to {path}")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(top)
@@ -0,0 +1,208 @@
+"""
+Functions for storing sales as a Parquet dataset partitioned by sale month
+"""
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as csv
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+import pyarrow.parquet as pq
+from config import CSV_EXPORT_PATH
+from listing_store import ListingStore
+
+DATASET_SCHEMA = pa.schema([
+    ('name', pa.string()),
+    ('year', pa.int16()),
+    ('price', pa.float64()),
+    ('date', pa.date32()),
+    ('is_manual', pa.bool_()),
+    ('is_v10', pa.bool_()),
+    # Filled by detail-page enrichment; null in files written before it or without it
+    ('mileage', pa.int32())
+])
+MANIFEST_FILE = "manifest.json"
+
+def get_dataset_path():
+    """Return the dataset directory next to the CSV export."""
+    return os.path.join("carData", "AudiR8", "sales_dataset")
+
+def _sale_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value.date() if isinstance(value, datetime) else value
+
+def _partition_key(day):
+    return f"{day.year:04d}/{day.month:02d}"
+
+def _partition_dir(key):
+    year, month = key.split("/")
+    return f"sale_year={year}/sale_month={month}"
+
+def read_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {"schema": DATASET_SCHEMA.names, "partitions": {}}
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_manifest(path, manifest):
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def _read_files(path, files, columns=None):
+    # One threaded scan over memory-mapped files rather than a read per file
+    dataset = ds.dataset([os.path.join(path, file) for file in files], schema=DATASET_SCHEMA,
+                         format="parquet", filesystem=fs.LocalFileSystem(use_mmap=True))
+    return dataset.to_table(columns=columns)
+
+def _widen(partition, field, value, pick):
+    partition[field] = value if partition.get(field) is None else pick(partition[field], value)
+
+def append_sales(path, rows):
+    """
+    Append parsed sales (saveCSV or parse_listing rows) to the dataset.
+
+    Rows are grouped by sale month and each touched month gets one new
+    part file; sales already in that month's partition are skipped, so
+    re-running a full crawl does not duplicate them. Existing files are
+    never rewritten. Returns the number of rows written.
+    """
+    os.makedirs(path, exist_ok=True)
+    manifest = read_manifest(path)
+    by_partition = {}
+    for row in rows:
+        day = _sale_date(row['date'])
+        by_partition.setdefault(_partition_key(day), {})[(row['name'], day)] = (row, day)
+
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    written = 0
+    for key, sales in sorted(by_partition.items()):
+        partition = manifest["partitions"].get(key)
+        if partition:
+            existing = _read_files(path, partition["files"], columns=['name', 'date'])
+            for name, day in zip(existing['name'].to_pylist(), existing['date'].to_pylist()):
+                sales.pop((name, day), None)
+        if not sales:
+            continue
+
+        values = list(sales.values())
+        table = pa.table({
+            'name': [row['name'] for row, _ in values],
+            'year': [row['year'] for row, _ in values],
+            'price': [row['price'] for row, _ in values],
+            'date': [day for _, day in values],
+            'is_manual': [bool(row['is_manual']) for row, _ in values],
+            'is_v10': [bool(row['is_v10']) for row, _ in values],
+            'mileage': [row.get('mileage') for row, _ in values]
+        }, schema=DATASET_SCHEMA).sort_by([('date', 'ascending'), ('name', 'ascending')])
+
+        directory = _partition_dir(key)
+        os.makedirs(os.path.join(path, directory), exist_ok=True)
+        file = f"{directory}/part-{stamp}-{len(partition['files']) if partition else 0:04d}.parquet"
+        tmp_path = os.path.join(path, file + ".tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(path, file))
+
+        partition = partition or {"files": [], "rows": 0}
+        dates, prices = table['date'], table['price']
+        partition["files"].append(file)
+        partition["rows"] += table.num_rows
+        _widen(partition, "min_date", pc.min(dates).as_py().isoformat(), min)
+        _widen(partition, "max_date", pc.max(dates).as_py().isoformat(), max)
+        _widen(partition, "min_price", pc.min(prices).as_py(), min)
+        _widen(partition, "max_price", pc.max(prices).as_py(), max)
+        manifest["partitions"][key] = partition
+        written += table.num_rows
+
+    _write_manifest(path, manifest)
+    return written
+
+def read_sales(path, start=None, end=None, columns=None) -> pa.Table:
+    """
+    Sales with start <= sale date <= end as one Arrow table.
+
+    Partitions whose manifest date range misses [start, end] are never
+    opened, and the part files that are read are memory-mapped.
+    """
+    start, end = _sale_date(start), _sale_date(end)
+    files = []
+    for key, partition in sorted(read_manifest(path)["partitions"].items()):
+        if start and partition["max_date"] < start.isoformat():
+            continue
+        if end and partition["min_date"] > end.isoformat():
+            continue
+        files.extend(partition["files"])
+
+    read_columns = columns if columns is None or 'date' in columns else list(columns) + ['date']
+    table = _read_files(path, files, read_columns)
+    if start:
+        table = table.filter(pc.greater_equal(table['date'], pa.scalar(start, pa.date32())))
+    if end:
+        table = table.filter(pc.less_equal(table['date'], pa.scalar(end, pa.date32())))
+    return table if columns is None else table.select(columns)
+
+def _store_from_table(table) -> ListingStore:
+    # Straight from Arrow columns, so loading saved sales never imports pandas
+    store = ListingStore(max(table.num_rows, 1))
+    store.extend(
+        table['name'].to_pylist(),
+        [''] * table.num_rows,
+        table['price'].to_numpy(),
+        table['date'].to_numpy(),
+        table['year'].to_numpy(),
+        table['is_manual'].to_numpy(),
+        table['is_v10'].to_numpy()
+    )
+    return store
+
+def load_listing_store(path, start=None, end=None) -> ListingStore:
+    """Read the dataset straight into a ListingStore for the analysis code."""
+    return _store_from_table(read_sales(path, start, end))
+
+def read_saved_sales(path, start=None, end=None, columns=None) -> pa.Table:
+    """
+    Sales from a dataset directory (see read_sales) or a saveCSV export,
+    as one Arrow table with start <= sale date <= end.
+    """
+    if os.path.isdir(path):
+        return read_sales(path, start, end, columns)
+    read_columns = None if columns is None else list(dict.fromkeys(list(columns) + ['date']))
+    table = csv.read_csv(path, convert_options=csv.ConvertOptions(
+        column_types={'date': pa.timestamp('s'), 'year': pa.int16(), 'price': pa.float64()},
+        include_columns=read_columns
+    ))
+    start, end = _sale_date(start), _sale_date(end)
+    if start:
+        since = datetime(start.year, start.month, start.day)
+        table = table.filter(pc.greater_equal(table['date'], pa.scalar(since, pa.timestamp('s'))))
+    if end:
+        before = datetime(end.year, end.month, end.day) + timedelta(days=1)
+        table = table.filter(pc.less(table['date'], pa.scalar(before, pa.timestamp('s'))))
+    return table if columns is None else table.select(columns)
+
+def last_saved_path(dataset_path=None, csv_path=CSV_EXPORT_PATH):
+    """The most recently written of the Parquet dataset and the CSV export, or None if neither exists."""
+    dataset_path = dataset_path or get_dataset_path()
+    manifest_path = os.path.join(dataset_path, MANIFEST_FILE)
+    candidates = [(os.path.getmtime(path), path) for path in (manifest_path, csv_path) if os.path.exists(path)]
+    if not candidates:
+        return None
+    _, path = max(candidates)
+    return dataset_path if path == manifest_path else path
+
+def load_last_sales(dataset_path=None, csv_path=CSV_EXPORT_PATH):
+    """
+    The most recently written of the Parquet dataset and the CSV export as
+    (ListingStore, path), or (None, None) if neither exists yet.
+    """
+    path = last_saved_path(dataset_path, csv_path)
+    if path is None:
+        return None, None
+    return _store_from_table(read_saved_sales(path)), path
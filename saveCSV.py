@@ -1,146 +1,207 @@
 import os
 import csv
-import re
 import time
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-
-def extract_year(name):
-    """Extract the year (20XX) from the listing name."""
-    match = re.search(r'\b(20\d{2})\b', name)
-    return int(match.group(1)) if match else None
+import argparse
+from contextlib import ExitStack
+from config import BASE_URL, MIN_YEAR, MAX_YEAR, FETCH_BACKEND, DETAIL_CACHE_DIR, CSV_EXPORT_PATH
+from driver_setup import get_driver_pool
+from http_scraper import ListingFetchError, load_all_listings_http
+from listing_details import enrich_sales
+from listing_index import ListingIndex
+from listing_parser import parse_listing
+from run_metrics import RunMetrics, count_webdriver_calls, profiled
+from sales_dataset import get_dataset_path, append_sales
+from web_scraper import set_year_filter, load_all_listings
 
 def parse_listing_data(name, details):
     """Return a dict with listing data if valid first-gen R8, else None."""
-    # Year check
-    year = extract_year(name)
-    if not year or year < 2008 or year > 2015:
-        return None
-    
-    # Price
-    price_match = re.search(r"\$([0-9,]+)", details)
-    if not price_match:
-        return None
-    price = float(price_match.group(1).replace(',', ''))
-    
-    # Sale date
-    date_match = re.search(r"on (\d{1,2}/\d{1,2}/\d{2})", details)
-    if not date_match:
-        return None
-    
-    date_str = date_match.group(1)
-    try:
-        date = datetime.strptime(date_str, "%m/%d/%y")
-    except ValueError:
-        return None
-    
-    # Transmission & engine
-    is_manual = '6-Speed' in name
-    is_v10 = 'V10' in name
-    
-    return {
-        'name': name,
-        'year': year,
-        'price': price,
-        'date': date.strftime("%Y-%m-%d"),  # Format date as YYYY-MM-DD for CSV
-        'is_manual': is_manual,
-        'is_v10': is_v10
-    }
-
-def scrape_audi_r8_data():
-    """Scrape first-gen Audi R8 data from Bring a Trailer and save to CSV."""
-    # Create folders if they don't exist
-    base_folder = "carData"
-    car_folder = os.path.join(base_folder, "AudiR8")
-    os.makedirs(car_folder, exist_ok=True)
-    csv_path = os.path.join(car_folder, "audi_r8_data.csv")
-    
-    # Setup WebDriver
-    options = Options()
-
-    # ---- the following 3 lines makes selenium headless
-    options.add_argument("--headless")          # No UI
-    options.add_argument("--no-sandbox")        # (Recommended for some Linux servers)
-    options.add_argument("--disable-dev-shm-usage")
-
-    options.add_experimental_option("detach", True)
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
-    )
-    
-    try:
+    row = parse_listing(name, details)
+    if row:
+        row['date'] = row['date'].strftime("%Y-%m-%d")  # Format date as YYYY-MM-DD for CSV
+    return row
+
+CSV_FIELDNAMES = ["name", "year", "price", "date", "is_manual", "is_v10", "mileage"]
+
+def get_csv_path():
+    """Return the CSV export path, creating its folders if they don't exist."""
+    os.makedirs(os.path.dirname(CSV_EXPORT_PATH), exist_ok=True)
+    return CSV_EXPORT_PATH
+
+def write_csv(csv_path, rows):
+    with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+def merge_new_rows(csv_path, rows):
+    """Append rows whose (name, date) is not already in the CSV; return them."""
+    existing = set()
+    if os.path.exists(csv_path):
+        with open(csv_path, newline="", encoding="utf-8") as csvfile:
+            existing = {(row["name"], row["date"]) for row in csv.DictReader(csvfile)}
+    new_rows = [row for row in rows if (row["name"], row["date"]) not in existing]
+
+    write_header = not os.path.exists(csv_path)
+    fieldnames = CSV_FIELDNAMES
+    if not write_header:
+        # Keep the columns of a CSV written before mileage was added
+        with open(csv_path, newline="", encoding="utf-8") as csvfile:
+            fieldnames = next(csv.reader(csvfile), None) or CSV_FIELDNAMES
+    with open(csv_path, "a", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction="ignore")
+        if write_header:
+            writer.writeheader()
+        writer.writerows(new_rows)
+    return new_rows
+
+def load_pages_selenium(should_stop, metrics, base_url=BASE_URL, urls=None):
+    """Every page of (name, details) pairs read through a pooled headless browser."""
+    pages = []
+    def on_page(page):
+        pages.append(page)
+        return should_stop(page)
+
+    with ExitStack() as stack:
+        # Lease a warm headless browser from the pool instead of cold-starting one
+        with metrics.span("driver"):
+            driver = stack.enter_context(get_driver_pool().lease())
+        stack.enter_context(count_webdriver_calls(driver, metrics))
+
         # Navigate
-        driver.get("https://bringatrailer.com/audi/r8/")
-        driver.maximize_window()
+        with metrics.span("navigate"):
+            driver.get(base_url)
+            driver.maximize_window()
         
         # Set year range
-        year_range_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//*[text()='Year Range']"))
-        )
-        year_range_button.click()
-        
-        min_year_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "/html/body/main/div[2]/div/div[2]/div/div/div[1]/div/div[2]/div[3]/div[4]/div[2]/div/input[1]"))
-        )
-        min_year_field.send_keys("2008")
-        
-        max_year_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "/html/body/main/div[2]/div/div[2]/div/div/div[1]/div/div[2]/div[3]/div[4]/div[2]/div/input[2]"))
-        )
-        max_year_field.send_keys("2015")
+        with metrics.span("year_filter"):
+            set_year_filter(driver, MAX_YEAR, min_year=MIN_YEAR)
         
-        # Load all listings by clicking "Show More" until it fails
-        while True:
-            try:
-                show_more_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "/html/body/main/div[2]/div/div[2]/div/div/div[2]/div[2]/button"))
-                )
-                show_more_button.click()
-                time.sleep(0.33)
-            except:
-                break
-        
-        # Scrape listings
-        listings = driver.find_elements(By.CSS_SELECTOR,
-            ".listings-container.auctions-grid .listing-card.bg-white-transparent")
+        # Load listings by clicking "Show More" until it fails
+        timings = load_all_listings(driver, on_page=on_page, urls=urls, metrics=metrics)
+        print(f"Loaded {len(timings)} pages in {sum(t.seconds for t in timings):.1f}s")
+    return pages
+
+def load_pages(should_stop, backend=FETCH_BACKEND, metrics=None, base_url=BASE_URL, urls=None):
+    """
+    Every page of (name, details) pairs, stopping after the first page for
+    which should_stop(page) is true. urls, if given, maps each pair to its
+    listing's detail page.
+
+    backend "http" reads the site's listings endpoint without a browser,
+    "selenium" drives headless Chrome, and "auto" tries HTTP first and falls
+    back to Selenium if the site does not answer as expected.
+    """
+    metrics = metrics or RunMetrics()
+    if backend in ("http", "auto"):
+        try:
+            with metrics.span("http_fetch") as span:
+                pages = load_all_listings_http(on_page=should_stop, urls=urls, base_url=base_url, metrics=metrics)
+                span["items"] = sum(len(page) for page in pages)
+            print(f"Loaded {len(pages)} pages over HTTP in {span['seconds']:.1f}s")
+            return pages
+        except ListingFetchError as e:
+            if backend == "http":
+                raise
+            metrics.count("http.fallbacks")
+            print(f"HTTP fetch failed ({e}), falling back to the browser")
+    return load_pages_selenium(should_stop, metrics, base_url, urls)
+
+def scrape_audi_r8_data(incremental=False, output="csv", metrics=None, backend=FETCH_BACKEND, base_url=BASE_URL,
+                        enrich=False):
+    """
+    Scrape first-gen Audi R8 data from Bring a Trailer and save to CSV.
+
+    With incremental=True, pagination stops at the first page whose sales are
+    all in the seen-listings index and only new rows are merged into the CSV.
+    output is "csv", "parquet" (append to the month-partitioned dataset) or
+    "both". backend picks how pages are fetched; see load_pages. With
+    enrich=True each sale's mileage is read from its detail page, through
+    the on-disk cache in DETAIL_CACHE_DIR. Each stage is recorded in
+    metrics (a RunMetrics), if given.
+    """
+    metrics = metrics or RunMetrics()
+    csv_path = get_csv_path()
+    index = ListingIndex(os.path.join(os.path.dirname(csv_path), "seen_listings.json"))
+    
+    try:
+        # Load every page, or stop at a page of already-known sales when crawling incrementally
+        urls = {}
+        pages = load_pages(lambda page: incremental and index.page_is_known(page), backend, metrics, base_url, urls)
         
         scraped_data = []
-        for listing in listings:
-            try:
-                name = listing.find_element(By.CSS_SELECTOR, ".content-main h3").text
-                details = listing.find_element(By.CSS_SELECTOR, ".content-main .item-results").text
-                
-                # Filter out "bid to" (which indicates incomplete sale/no final price)
-                if "bid to" not in details.lower():
-                    row = parse_listing_data(name, details)
-                    if row:
-                        scraped_data.append(row)
-            except Exception:
-                continue
+        detail_urls = []
+        with metrics.span("parse") as span:
+            for page in pages:
+                for name, details in page:
+                    # Filter out "bid to" (which indicates incomplete sale/no final price)
+                    if "bid to" not in details.lower():
+                        row = parse_listing_data(name, details)
+                        if row:
+                            scraped_data.append(row)
+                            detail_urls.append(urls.get((name, details)))
+                index.add_cards(page)
+            span["items"] = sum(len(page) for page in pages)
+
+        # Mileage is only on each auction's own page; unchanged pages come from the cache
+        if enrich:
+            enriched = enrich_sales(list(zip(scraped_data, detail_urls)), DETAIL_CACHE_DIR, metrics)
+            print(f"Read mileage for {enriched} of {len(scraped_data)} sales from their detail pages")
         
         # Write to CSV
-        with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
-            fieldnames = ["name", "year", "price", "date", "is_manual", "is_v10"]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in scraped_data:
-                writer.writerow(row)
+        if output in ("csv", "both"):
+            with metrics.span("write_csv") as span:
+                if incremental:
+                    new_rows = merge_new_rows(csv_path, scraped_data)
+                    print(f"Scraped {len(scraped_data)} listings, {len(new_rows)} new. Data merged into {csv_path}")
+                else:
+                    write_csv(csv_path, scraped_data)
+                    print(f"Scraped {len(scraped_data)} listings. Data saved to {csv_path}")
+                span["items"] = len(scraped_data)
         
-        print(f"Scraped {len(scraped_data)} listings. Data saved to {csv_path}")
+        # Append to the Parquet dataset; sales it already holds are skipped
+        if output in ("parquet", "both"):
+            with metrics.span("write_parquet") as span:
+                dataset_path = get_dataset_path()
+                written = append_sales(dataset_path, scraped_data)
+                print(f"Scraped {len(scraped_data)} listings, {written} new. Data appended to {dataset_path}")
+                span["items"] = len(scraped_data)
+        with metrics.span("save_index"):
+            index.save()
     
     except Exception as e:
         print(f"An error occurred: {e}")
-    
-    finally:
-        driver.quit()
 
 if __name__ == "__main__":
-    scrape_audi_r8_data()
+    parser = argparse.ArgumentParser(description="Export first-gen Audi R8 sales to CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="stop at already-known sales and append only new rows")
+    parser.add_argument("--format", choices=["csv", "parquet", "both"], default="csv",
+                        help="write the CSV, the sale-month partitioned Parquet dataset, or both")
+    parser.add_argument("--every", type=float, metavar="MINUTES",
+                        help="keep running and export again every MINUTES, reusing the warm browser")
+    parser.add_argument("--backend", choices=["auto", "http", "selenium"], default=FETCH_BACKEND,
+                        help="read listings over HTTP, through headless Chrome, or HTTP with Chrome as fallback")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--enrich", action="store_true",
+                        help="read each sale's mileage from its detail page (cached on disk between runs)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="append each run's stage timings and counters to FILE as JSON lines")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="run under cProfile, print the top functions and optionally save the stats to FILE")
+    args = parser.parse_args()
+
+    while True:
+        metrics = RunMetrics()
+        with ExitStack() as stack:
+            if args.profile is not None:
+                stack.enter_context(profiled(args.profile or None))
+            scrape_audi_r8_data(incremental=args.incremental, output=args.format, metrics=metrics,
+                                backend=args.backend, base_url=args.base_url, enrich=args.enrich)
+        print(metrics.summary())
+        if args.metrics:
+            metrics.write_jsonl(args.metrics)
+        if not args.every:
+            break
+        time.sleep(args.every * 60)
 
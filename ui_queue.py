@@ -0,0 +1,136 @@
+"""
+Thread-safe, batched UI updates for the Tk front ends
+"""
+import threading
+import time
+import tkinter as tk
+from config import UI_FLUSH_INTERVAL_MS, UI_MAX_TEXT_CHARS
+
+class UIUpdateQueue:
+    """
+    Collects UI updates from worker threads and applies them on the Tk thread.
+
+    Text appended to a widget between flushes is joined and inserted in one
+    call, a label only shows its latest text, and the queue is drained every
+    interval_ms milliseconds by a single recurring root.after callback, so
+    the event loop sees a fixed update rate however fast messages arrive.
+    Text widgets keep at most max_chars characters, oldest text dropped first.
+
+    depth, peak_depth, last_latency and max_latency report how far the UI is
+    behind: latency is the time from the oldest message in a flush being
+    queued until the flush has been applied.
+    """
+
+    def __init__(self, root, interval_ms=UI_FLUSH_INTERVAL_MS, max_chars=UI_MAX_TEXT_CHARS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._text = {}
+        self._cleared = set()
+        self._labels = {}
+        self._calls = []
+        self._depth = 0
+        self._oldest = None
+        self._chars = {}
+        self._job = None
+        self.peak_depth = 0
+        self.flushes = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Messages queued since the last flush."""
+        with self._lock:
+            return self._depth
+
+    def _queued(self):
+        # Caller holds the lock
+        self._depth += 1
+        self.peak_depth = max(self.peak_depth, self._depth)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def append_text(self, widget, text: str):
+        with self._lock:
+            self._text.setdefault(widget, []).append(text)
+            self._queued()
+
+    def clear_text(self, widget):
+        """Empty widget, dropping any text still queued for it."""
+        with self._lock:
+            self._text.pop(widget, None)
+            self._cleared.add(widget)
+            self._queued()
+
+    def set_label(self, widget, text: str):
+        with self._lock:
+            self._labels[widget] = text
+            self._queued()
+
+    def call(self, func, *args):
+        """Run func(*args) on the Tk thread at the next flush, after queued updates."""
+        with self._lock:
+            self._calls.append((func, args))
+            self._queued()
+
+    def reset_stats(self):
+        """Start peak_depth, flushes and the latencies over, e.g. for a new run."""
+        self.peak_depth = 0
+        self.flushes = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+
+    def start(self):
+        if self._job is None:
+            self._job = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        self._job = None
+        try:
+            self.flush()
+        finally:
+            self._job = self.root.after(self.interval_ms, self._tick)
+
+    def flush(self):
+        """Apply every queued update; must be called on the Tk thread."""
+        with self._lock:
+            text, self._text = self._text, {}
+            cleared, self._cleared = self._cleared, set()
+            labels, self._labels = self._labels, {}
+            calls, self._calls = self._calls, []
+            oldest, self._oldest = self._oldest, None
+            self._depth = 0
+        if oldest is None:
+            return
+
+        for widget in cleared:
+            widget.delete(1.0, tk.END)
+            self._chars[widget] = 0
+        for widget, parts in text.items():
+            self._insert(widget, "".join(parts))
+        for widget, message in labels.items():
+            widget.config(text=message)
+        for func, args in calls:
+            func(*args)
+
+        self.flushes += 1
+        self.last_latency = time.monotonic() - oldest
+        self.max_latency = max(self.max_latency, self.last_latency)
+
+    def _insert(self, widget, chunk: str):
+        if len(chunk) > self.max_chars:
+            chunk = chunk[-self.max_chars:]
+        widget.insert(tk.END, chunk)
+        chars = self._chars.get(widget, 0) + len(chunk)
+        excess = chars - self.max_chars
+        if excess > 0:
+            widget.delete(1.0, f"1.0 + {excess} chars")
+            chars = self.max_chars
+        self._chars[widget] = chars
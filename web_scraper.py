@@ -4,34 +4,230 @@ Functions for web scraping operations
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import json
 import time
+from dataclasses import dataclass
+from typing import List
+from config import (
+    EXTRACTION_MODE, PAGINATION_POLL_INTERVAL, PAGINATION_MAX_POLL_INTERVAL,
+    PAGINATION_BACKOFF, PAGINATION_PAGE_TIMEOUT, PAGINATION_SETTLE_TIMEOUT
+)
+from page_parser import parse_listing_cards
+from run_metrics import RunMetrics
 
-def set_year_filter(driver, year):
+MIN_YEAR_INPUT_XPATH = "/html/body/main/div[2]/div/div[2]/div/div/div[1]/div/div[2]/div[3]/div[4]/div[2]/div/input[1]"
+MAX_YEAR_INPUT_XPATH = "/html/body/main/div[2]/div/div[2]/div/div/div[1]/div/div[2]/div[3]/div[4]/div[2]/div/input[2]"
+SHOW_MORE_BUTTON_XPATH = "/html/body/main/div[2]/div/div[2]/div/div/div[2]/div[2]/button"
+
+LISTING_CARD_SELECTOR = ".listings-container.auctions-grid .listing-card.bg-white-transparent"
+LISTING_NAME_SELECTOR = ".content-main h3"
+LISTING_DETAILS_SELECTOR = ".content-main .item-results"
+
+# Returns every card's name, results text and link in a single WebDriver round trip.
+# innerText renders the same visible text that WebElement.text does.
+EXTRACT_LISTINGS_SCRIPT = """
+const cards = Array.from(document.querySelectorAll(arguments[0])).slice(arguments[3]);
+const rows = [];
+for (const card of cards) {
+    const name = card.querySelector(arguments[1]);
+    const details = card.querySelector(arguments[2]);
+    rows.push(name && details ? [name.innerText.trim(), details.innerText.trim(), card.href || null] : null);
+}
+return JSON.stringify(rows);
+"""
+
+# Card count and "Show More" button state: missing, hidden, disabled or ready
+PAGINATION_STATE_SCRIPT = """
+const count = document.querySelectorAll(arguments[0]).length;
+const button = document.evaluate(arguments[1], document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!button) return [count, 'missing'];
+const style = window.getComputedStyle(button);
+if (button.offsetParent === null || style.display === 'none' || style.visibility === 'hidden') {
+    return [count, 'hidden'];
+}
+if (button.disabled || button.getAttribute('aria-disabled') === 'true') return [count, 'disabled'];
+return [count, 'ready'];
+"""
+
+CLICK_SHOW_MORE_SCRIPT = """
+const button = document.evaluate(arguments[0], document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (button) button.click();
+"""
+
+def set_year_filter(driver, year, min_year=None):
     year_range_button = WebDriverWait(driver, 10).until(
         EC.element_to_be_clickable((By.XPATH, "//*[text()='Year Range']"))
     )
     year_range_button.click()
 
+    if min_year is not None:
+        min_year_field = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.XPATH, MIN_YEAR_INPUT_XPATH))
+        )
+        min_year_field.send_keys(min_year)
+
     input_field = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.XPATH, "/html/body/main/div[2]/div/div[2]/div/div/div[1]/div/div[2]/div[3]/div[4]/div[2]/div/input[2]"))
+        EC.presence_of_element_located((By.XPATH, MAX_YEAR_INPUT_XPATH))
     )
     input_field.send_keys(year)
 
-def load_all_listings(driver):
-    while True:
-        try:
-            show_more_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "/html/body/main/div[2]/div/div[2]/div/div/div[2]/div[2]/button"))
-            )
-            show_more_button.click()
-            driver.implicitly_wait(1)
-            time.sleep(1/3)
-        except Exception as e:
-            print(f"No more 'Show More' button found: {e}")
-            break
+@dataclass
+class PageTiming:
+    page: int
+    cards: int
+    seconds: float
+
+class Paginator:
+    """
+    Loads listing pages by clicking "Show More" and waiting for the card
+    count to grow, polling with exponential backoff up to max_poll_interval.
+
+    The end of the list is read from the button itself: once it is missing
+    or hidden there is nothing left to load, so no timeout is paid. A
+    disabled button is given settle_timeout to re-enable; if it stays
+    disabled and no cards arrive meanwhile, the list has ended too.
+    page_timeout only guards against a click that never produces cards.
+    throttle, if given, is called before every click to rate-limit requests.
+    metrics, if given, gets a span per page load and per extraction.
+    """
+
+    def __init__(self, driver, poll_interval=None, max_poll_interval=None,
+                 backoff=None, page_timeout=None, settle_timeout=None, throttle=None, metrics=None):
+        self.driver = driver
+        self.throttle = throttle
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        self.poll_interval = PAGINATION_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.max_poll_interval = PAGINATION_MAX_POLL_INTERVAL if max_poll_interval is None else max_poll_interval
+        self.backoff = PAGINATION_BACKOFF if backoff is None else backoff
+        self.page_timeout = PAGINATION_PAGE_TIMEOUT if page_timeout is None else page_timeout
+        self.settle_timeout = PAGINATION_SETTLE_TIMEOUT if settle_timeout is None else settle_timeout
+        self.timings: List[PageTiming] = []
+
+    def state(self):
+        """Return (card count, button state) in one round trip."""
+        count, button = self.driver.execute_script(
+            PAGINATION_STATE_SCRIPT, LISTING_CARD_SELECTOR, SHOW_MORE_BUTTON_XPATH
+        )
+        return count, button
+
+    def _poll(self, done, timeout):
+        """Poll state() until done(count, button) is truthy or timeout seconds pass."""
+        interval = self.poll_interval
+        deadline = time.monotonic() + timeout
+        while True:
+            count, button = self.state()
+            result = done(count, button)
+            if result or time.monotonic() >= deadline:
+                return count, button, result
+            time.sleep(interval)
+            interval = min(interval * self.backoff, self.max_poll_interval)
+
+    def wait_for_first_page(self):
+        start = time.monotonic()
+        count, _, _ = self._poll(lambda count, button: count > 0 or button != "missing", self.page_timeout)
+        self.timings.append(PageTiming(0, count, time.monotonic() - start))
+        return count
+
+    def next_page(self, count):
+        """Load one more page; return the new card count, or None at the end of the list."""
+        start = time.monotonic()
+        # A disabled button may be the previous load still settling, or the end of the list
+        settled_count, button, _ = self._poll(lambda count, button: button != "disabled", self.settle_timeout)
+        if button == "disabled" and settled_count > count:
+            # Cards are still arriving; hand them over and check the button again next page
+            self.timings.append(PageTiming(len(self.timings), settled_count, time.monotonic() - start))
+            return settled_count
+        if button != "ready":
+            return None
+
+        if self.throttle is not None:
+            self.throttle()
+        self.driver.execute_script(CLICK_SHOW_MORE_SCRIPT, SHOW_MORE_BUTTON_XPATH)
+        new_count, button, _ = self._poll(
+            lambda new_count, button: new_count > count or button in ("missing", "hidden"),
+            self.page_timeout
+        )
+        if new_count <= count:
+            if button == "ready":
+                print(f"'Show More' produced no new listings within {self.page_timeout}s")
+            return None
+        self.timings.append(PageTiming(len(self.timings), new_count, time.monotonic() - start))
+        return new_count
+
+    def load_all(self, on_page=None, urls=None):
+        """
+        Click "Show More" until the list ends and return the page timings.
+
+        If on_page is given it is called with the (name, details) pairs of the
+        cards added by each page load, starting with the initial page; returning
+        True stops pagination early. urls, if given, is filled as in
+        extract_listing_texts.
+        """
+        loaded = 0
+        with self.metrics.span("page_load") as span:
+            count = span["items"] = self.wait_for_first_page()
+        while count is not None:
+            self.metrics.count("pages")
+            if on_page is not None:
+                with self.metrics.span("extract") as span:
+                    page = extract_listing_texts(self.driver, EXTRACTION_MODE, start=loaded, urls=urls)
+                    span["items"] = len(page)
+                self.metrics.count("cards", len(page))
+                loaded = count
+                if on_page(page):
+                    print("Reached already-known listings, stopping pagination")
+                    break
+            with self.metrics.span("page_load") as span:
+                new_count = self.next_page(count)
+                span["items"] = new_count - count if new_count is not None else 0
+            count = new_count
+        return self.timings
+
+def load_all_listings(driver, on_page=None, urls=None, **paginator_options):
+    """Load every listing page; see Paginator.load_all. Returns the page timings."""
+    return Paginator(driver, **paginator_options).load_all(on_page=on_page, urls=urls)
 
 def get_listings(driver):
-    return driver.find_elements(
-        By.CSS_SELECTOR,
-        ".listings-container.auctions-grid .listing-card.bg-white-transparent"
-    )
+    return driver.find_elements(By.CSS_SELECTOR, LISTING_CARD_SELECTOR)
+
+def extract_listing_texts(driver, mode="script", start=0, urls=None):
+    """
+    Return a (name, details) pair for every loaded listing card from the
+    start-th card onwards.
+
+    mode="script" reads all cards with one execute_script call,
+    mode="snapshot" parses a single page_source snapshot, and
+    mode="elements" falls back to two find_element calls per card.
+    Cards missing either element are skipped in every mode. If urls is a
+    dict, each card's link is stored in it under its (name, details) pair.
+    """
+    if mode == "script":
+        rows = json.loads(driver.execute_script(
+            EXTRACT_LISTINGS_SCRIPT,
+            LISTING_CARD_SELECTOR,
+            LISTING_NAME_SELECTOR,
+            LISTING_DETAILS_SELECTOR,
+            start
+        ))
+        rows = [row for row in rows if row]
+        if urls is not None:
+            urls.update(((row[0], row[1]), row[2]) for row in rows if len(row) > 2 and row[2])
+        return [(row[0], row[1]) for row in rows]
+    if mode == "snapshot":
+        base_url = driver.current_url if urls is not None else None
+        return [row for row in parse_listing_cards(driver.page_source, urls, base_url)[start:] if row]
+    if mode == "elements":
+        rows = []
+        for listing in get_listings(driver)[start:]:
+            try:
+                name = listing.find_element(By.CSS_SELECTOR, LISTING_NAME_SELECTOR).text
+                details = listing.find_element(By.CSS_SELECTOR, LISTING_DETAILS_SELECTOR).text
+                rows.append((name, details))
+                if urls is not None:
+                    urls[(name, details)] = listing.get_attribute("href")
+            except Exception:
+                continue
+        return rows
+    raise ValueError(f"Unknown extraction mode: {mode}")